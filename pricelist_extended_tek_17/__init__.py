@@ -1,2 +1,3 @@
 from . import models
-from . import wizard
\ No newline at end of file
+from . import wizard
+from . import report
\ No newline at end of file
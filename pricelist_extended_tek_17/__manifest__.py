@@ -1,6 +1,6 @@
 {
     'name': 'Product Pricing Extension',
-    'version': '17.0.1.0',
+    'version': '17.0.2.0',
     'summary': 'Add pricing type, last purchase price, operational margin, and advanced quantity/customer pricing to products.',
     'description': """
 Product Pricing Extension
@@ -16,17 +16,27 @@ Product Pricing Extension
     'depends': ['product','contacts','sale','account'],
     'data': [
         'data/ir_module_category_data.xml',
+        'data/ir_config_parameter_data.xml',
+        'data/ir_cron_data.xml',
         'security/ir.model.access.csv',
+        'views/product_price_grid_views.xml',
+        'views/product_pricing_rule_views.xml',
         'views/product_view.xml',
+        'views/product_customer_price_views.xml',
         'views/res_partner_customer_type.xml',
         'views/res_partner_view.xml',
         'views/sale_order_view.xml',
+        'views/pricing_stage_stat_views.xml',
+        'views/product_price_change_views.xml',
+        'report/sale_landing_margin_report_views.xml',
         'wizard/price_lp_cus_wizard_views.xml',
         'wizard/price_lp_fixed_wizard_views.xml',
         'wizard/price_reg_cus_wizard_views.xml',
         'wizard/price_reg_fixed_wizard_views.xml',
         'wizard/price_lp_cus_pur_wizard_views.xml',
         'wizard/price_lp_pur_fixed_wizard_views.xml',
+        'wizard/pricing_simulation_wizard_views.xml',
+        'data/product_customer_price_data.xml',
     ],
     'installable': True,
     'application': False,
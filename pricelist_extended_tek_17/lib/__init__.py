@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# Pure python helpers, importable without Odoo: do not import odoo here.
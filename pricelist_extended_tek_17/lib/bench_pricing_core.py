@@ -0,0 +1,65 @@
+"""Micro-benchmarks of the pricing core, run from the addon directory::
+
+    python -m lib.bench_pricing_core [--number N]
+"""
+import argparse
+import random
+import timeit
+from array import array
+
+from . import pricing_core as core
+
+
+def _history(n_templates, n_lines, seed=42):
+    rng = random.Random(seed)
+    templates = {
+        'id': array('l', range(1, n_templates + 1)),
+        'categ': array('l', (rng.randint(1, 20) for _i in range(n_templates))),
+        'family': array('b', (rng.choice((core.REGULAR, core.LP_BASED)) for _i in range(n_templates))),
+        'last_purchase_price': array('d', (rng.uniform(10, 500) for _i in range(n_templates))),
+        'operational_margin': array('d', (rng.uniform(0, 15) for _i in range(n_templates))),
+        'mrp_price': array('d', (rng.uniform(600, 1000) for _i in range(n_templates))),
+        'pricing_cost': array('d', (rng.uniform(10, 500) for _i in range(n_templates))),
+        'tiers': [[(1.0, 9.0, 25.0), (10.0, 49.0, 18.0), (50.0, 0.0, 12.0)]] * n_templates,
+        'customer_margins': [{1: 10.0, 2: 8.0}] * n_templates,
+    }
+    lines = {
+        'template': array('l', (rng.randrange(n_templates) for _i in range(n_lines))),
+        'qty': array('d', (rng.randint(1, 100) for _i in range(n_lines))),
+        'price_unit': array('d', (rng.uniform(10, 1000) for _i in range(n_lines))),
+        'fixed': array('b', (rng.random() < 0.3 for _i in range(n_lines))),
+        'customer_type': array('l', (rng.choice((0, 1, 3)) for _i in range(n_lines))),
+    }
+    ancestors = {0: (), 1: (1,), 3: (3, 2)}
+    return lines, templates, ancestors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=100000, help="calls per micro-benchmark")
+    args = parser.parse_args()
+
+    table = [[1.0, 9.0, 120.0], [10.0, 49.0, 110.0], [50.0, 0.0, 100.0]]
+    chain = (7, 5, 3, 1)
+    values = {1: 100.0}
+    benches = [
+        ("round_price", lambda: core.round_price(2.675)),
+        ("landing_price", lambda: core.landing_price(100.0, 12.5)),
+        ("rule_price regular", lambda: core.rule_price('regular', 112.5, 900.0, 18.0)),
+        ("rule_price lp", lambda: core.rule_price('lp_based', 112.5, 900.0, 18.0)),
+        ("find_table_row", lambda: core.find_table_row(table, 60.0)),
+        ("resolve_customer_type", lambda: core.resolve_customer_type(values, chain)),
+    ]
+    for name, func in benches:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3))
+        print("%-24s %8.3f us/call" % (name, seconds / args.number * 1e6))
+
+    lines, templates, ancestors = _history(2000, 100000)
+    scenario = {'operational_delta': 2.0, 'tier_delta': 1.0, 'bound_factor': 1.5}
+    seconds = min(timeit.repeat(
+        lambda: core.simulate(lines, templates, ancestors, scenario), number=1, repeat=3))
+    print("%-24s %8.3f s for %d lines" % ("simulate", seconds, len(lines['qty'])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Pricing arithmetic and rule resolution on plain data structures.
+
+The models delegate the computation of landing prices, rule prices and
+margins, the tier and customer type matching and the simulation loop to
+these functions, which don't depend on the ORM. They are tested and
+benchmarked without a database, from the addon directory::
+
+    python -m unittest discover -s lib/tests -t .
+    python -m lib.bench_pricing_core
+"""
+import math
+from array import array
+from collections import defaultdict
+
+REGULAR, LP_BASED, LP_BASED_PURCHASE = 0, 1, 2
+FAMILY_CODES = {'regular': REGULAR, 'lp_based': LP_BASED, 'lp_based_purchase': LP_BASED_PURCHASE}
+
+
+def round_price(value, precision_digits=2):
+    """Round half away from zero like odoo.tools.float_round, including its
+    epsilon correction of binary representation errors (2.675 -> 2.68)."""
+    if not value:
+        return 0.0
+    rounding_factor = 10 ** -precision_digits
+    normalized_value = value / rounding_factor
+    sign = math.copysign(1.0, normalized_value)
+    normalized_value += sign * 2 ** (math.log(abs(normalized_value), 2) - 52)
+    rounded_value = sign * math.floor(abs(normalized_value) + 0.5)
+    return round(rounded_value * rounding_factor, precision_digits)
+
+
+def landing_price(last_purchase_price, operational_margin):
+    """Last purchase price plus the operational margin (%)"""
+    if not last_purchase_price:
+        return 0.0
+    return last_purchase_price * (1 + (operational_margin / 100))
+
+
+def rule_price(family, landing, mrp, margin_per):
+    """Sale price of a rule: a margin on the landing price for regular rules,
+    a discount on the MRP price for LP rules. 0 without base price."""
+    if family == 'regular':
+        base_price, price = landing, landing * (1 + (margin_per / 100))
+    else:
+        base_price, price = mrp, mrp * (1 - (margin_per / 100))
+    return round_price(price) if base_price else 0.0
+
+
+def rule_margin(family, amount, landing, cost):
+    """Margin of a rule price, measured against the cost for LP
+    (manufacture) rules and against the landing price otherwise."""
+    base_price = cost if family == 'lp_based' else landing
+    return round_price(abs(amount - base_price)) if base_price else 0.0
+
+
+def in_tier(min_qty, max_qty, qty):
+    """Tier bounds are inclusive and 0 means unbounded"""
+    return (not min_qty or min_qty <= qty) and (not max_qty or qty <= max_qty)
+
+
+def find_table_row(table, qty):
+    """First [min qty, max qty, price, ...] row of ``table`` containing
+    ``qty``. Rows are expected sorted by min qty."""
+    for row in table:
+        if in_tier(row[0], row[1], qty):
+            return row
+    return None
+
+
+def find_tier_margin(tiers, qty, bound_factor=1.0):
+    """Margin of the (min qty, max qty, margin) tier containing ``qty``, with
+    the bounds scaled by ``bound_factor``."""
+    for min_qty, max_qty, margin_per in tiers:
+        if in_tier(min_qty * bound_factor, max_qty * bound_factor, qty):
+            return margin_per
+    return None
+
+
+def find_overlap(intervals):
+    """Return the first two overlapping (lower, upper) intervals, or None.
+
+    Unbounded sides are given as -inf / inf; ``intervals`` is sorted in place.
+    """
+    intervals.sort()
+    for interval, next_interval in zip(intervals, intervals[1:]):
+        if next_interval[0] <= interval[1]:
+            return interval, next_interval
+    return None
+
+
+def resolve_customer_type(values, chain):
+    """Return the first customer type id of ``chain`` (the type then its
+    ancestors) that has an entry in ``values``, or None."""
+    for type_id in chain:
+        if type_id in values:
+            return type_id
+    return None
+
+
+def simulate(lines, templates, ancestors, scenario, group_by='product'):
+    """Price historical lines with the current and the proposed parameters.
+
+    ``lines`` and ``templates`` are dicts of parallel arrays, see
+    ``pricing.simulation.wizard._load_history``; ``ancestors`` maps customer
+    type ids to their ancestor chain. ``scenario`` holds the proposed
+    ``operational_delta``, ``customer_delta`` (for ``customer_type_id``, all
+    types when empty), ``tier_delta`` and ``bound_factor``.
+
+    Return the [qty, revenue, new revenue, margin, new margin] totals per
+    product, category or customer type. Lines without applicable rule keep
+    their historical price in both scenarios.
+    """
+    operational_delta = scenario.get('operational_delta', 0.0)
+    customer_delta = scenario.get('customer_delta', 0.0)
+    delta_customer_type = scenario.get('customer_type_id')
+    tier_delta = scenario.get('tier_delta', 0.0)
+    bound_factor = scenario.get('bound_factor') or 1.0
+
+    # landing prices and costs per template, current and proposed
+    landing, new_landing, cost, new_cost = array('d'), array('d'), array('d'), array('d')
+    for index, family in enumerate(templates['family']):
+        last_purchase_price = templates['last_purchase_price'][index]
+        operational_margin = templates['operational_margin'][index]
+        landing.append(landing_price(last_purchase_price, operational_margin))
+        new_landing.append(landing_price(last_purchase_price, operational_margin + operational_delta))
+        if family == LP_BASED:
+            cost.append(templates['pricing_cost'][index])
+            new_cost.append(templates['pricing_cost'][index])
+        else:
+            cost.append(landing[index])
+            new_cost.append(new_landing[index])
+
+    totals = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0, 0.0])
+    for template, qty, price_unit, fixed, customer_type in zip(
+            lines['template'], lines['qty'], lines['price_unit'], lines['fixed'], lines['customer_type']):
+        family = templates['family'][template]
+        if fixed:
+            customer_margins = templates['customer_margins'][template]
+            margin_type = resolve_customer_type(customer_margins, ancestors.get(customer_type, ()))
+            margin_per = customer_margins[margin_type] if margin_type else None
+            new_margin_per = margin_per
+            if margin_per is not None and (not delta_customer_type or margin_type == delta_customer_type):
+                new_margin_per = margin_per + customer_delta
+        else:
+            tiers = templates['tiers'][template]
+            margin_per = find_tier_margin(tiers, qty or 1.0)
+            new_margin_per = find_tier_margin(tiers, qty or 1.0, bound_factor)
+            if new_margin_per is not None:
+                new_margin_per += tier_delta
+
+        if family == REGULAR:
+            base, new_base, sign = landing[template], new_landing[template], 1
+        else:
+            base = new_base = templates['mrp_price'][template]
+            sign = -1
+        price = price_unit if margin_per is None or not base else \
+            round_price(base * (1 + sign * margin_per / 100))
+        new_price = price_unit if new_margin_per is None or not new_base else \
+            round_price(new_base * (1 + sign * new_margin_per / 100))
+
+        if group_by == 'product':
+            key = templates['id'][template]
+        elif group_by == 'category':
+            key = templates['categ'][template]
+        else:
+            key = customer_type if fixed else 0
+        total = totals[key]
+        total[0] += qty
+        total[1] += price * qty
+        total[2] += new_price * qty
+        total[3] += (price - cost[template]) * qty
+        total[4] += (new_price - new_cost[template]) * qty
+    return totals
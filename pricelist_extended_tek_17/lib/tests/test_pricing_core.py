@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Run from the addon directory: python -m unittest discover -s lib/tests -t ."""
+
+import unittest
+from array import array
+
+from .. import pricing_core as core
+
+
+class TestRounding(unittest.TestCase):
+
+    def test_half_up(self):
+        self.assertEqual(core.round_price(2.675), 2.68)
+        self.assertEqual(core.round_price(1.005), 1.01)
+        self.assertEqual(core.round_price(0.125), 0.13)
+        self.assertEqual(core.round_price(-0.125), -0.13)
+        self.assertEqual(core.round_price(10.0), 10.0)
+        self.assertEqual(core.round_price(0.0), 0.0)
+
+    def test_precision(self):
+        self.assertEqual(core.round_price(1.23456, 3), 1.235)
+        self.assertEqual(core.round_price(1.5, 0), 2.0)
+
+
+class TestPrices(unittest.TestCase):
+
+    def test_landing_price(self):
+        self.assertAlmostEqual(core.landing_price(100.0, 10.0), 110.0)
+        self.assertEqual(core.landing_price(0.0, 10.0), 0.0)
+
+    def test_regular_rule_price(self):
+        # margin on the landing price
+        self.assertEqual(core.rule_price('regular', 110.0, 500.0, 20.0), 132.0)
+        self.assertEqual(core.rule_price('regular', 0.0, 500.0, 20.0), 0.0)
+
+    def test_lp_rule_price(self):
+        # discount on the MRP price
+        for family in ('lp_based', 'lp_based_purchase'):
+            self.assertEqual(core.rule_price(family, 110.0, 500.0, 20.0), 400.0)
+            self.assertEqual(core.rule_price(family, 110.0, 0.0, 20.0), 0.0)
+
+    def test_rule_margin(self):
+        self.assertEqual(core.rule_margin('regular', 132.0, 110.0, 90.0), 22.0)
+        self.assertEqual(core.rule_margin('lp_based_purchase', 400.0, 110.0, 90.0), 290.0)
+        # LP (manufacture) margins are measured against the cost
+        self.assertEqual(core.rule_margin('lp_based', 400.0, 110.0, 90.0), 310.0)
+        self.assertEqual(core.rule_margin('lp_based', 400.0, 110.0, 0.0), 0.0)
+
+
+class TestMatching(unittest.TestCase):
+
+    table = [
+        [0.0, 9.0, 15.0],
+        [10.0, 49.0, 12.0],
+        [50.0, 0.0, 10.0],
+    ]
+
+    def test_tier_bounds(self):
+        self.assertTrue(core.in_tier(10.0, 20.0, 10.0))
+        self.assertTrue(core.in_tier(10.0, 20.0, 20.0))
+        self.assertFalse(core.in_tier(10.0, 20.0, 20.5))
+        self.assertTrue(core.in_tier(0.0, 0.0, 1e9))
+
+    def test_find_table_row(self):
+        self.assertEqual(core.find_table_row(self.table, 1.0)[2], 15.0)
+        self.assertEqual(core.find_table_row(self.table, 10.0)[2], 12.0)
+        self.assertEqual(core.find_table_row(self.table, 1000.0)[2], 10.0)
+        self.assertIsNone(core.find_table_row(self.table, 9.5))
+        self.assertIsNone(core.find_table_row([], 1.0))
+
+    def test_find_tier_margin(self):
+        tiers = [(1.0, 9.0, 30.0), (10.0, 0.0, 20.0)]
+        self.assertEqual(core.find_tier_margin(tiers, 10.0), 20.0)
+        # doubled bounds: 10 now falls in the first tier
+        self.assertEqual(core.find_tier_margin(tiers, 10.0, 2.0), 30.0)
+        self.assertIsNone(core.find_tier_margin(tiers, 0.5))
+
+    def test_find_overlap(self):
+        inf = float('inf')
+        self.assertIsNone(core.find_overlap([(10.0, 20.0), (-inf, 9.0), (21.0, inf)]))
+        self.assertEqual(
+            core.find_overlap([(10.0, 20.0), (20.0, inf), (-inf, 9.0)]),
+            ((10.0, 20.0), (20.0, inf)),
+        )
+
+    def test_resolve_customer_type(self):
+        prices = {1: 100.0, 5: 90.0}
+        self.assertEqual(core.resolve_customer_type(prices, (5, 1)), 5)
+        self.assertEqual(core.resolve_customer_type(prices, (9, 5, 1)), 5)
+        self.assertEqual(core.resolve_customer_type(prices, (7, 1)), 1)
+        self.assertIsNone(core.resolve_customer_type(prices, (7, 8)))
+        self.assertIsNone(core.resolve_customer_type(prices, ()))
+
+
+class TestSimulation(unittest.TestCase):
+
+    def setUp(self):
+        # one regular template with two tiers and a customer type margin
+        self.templates = {
+            'id': array('l', [42]),
+            'categ': array('l', [3]),
+            'family': array('b', [core.REGULAR]),
+            'last_purchase_price': array('d', [100.0]),
+            'operational_margin': array('d', [10.0]),
+            'mrp_price': array('d', [0.0]),
+            'pricing_cost': array('d', [0.0]),
+            'tiers': [[(1.0, 9.0, 20.0), (10.0, 0.0, 10.0)]],
+            'customer_margins': [{1: 5.0}],
+        }
+        self.lines = {
+            'template': array('l', [0, 0, 0]),
+            'qty': array('d', [5.0, 10.0, 2.0]),
+            'price_unit': array('d', [132.0, 121.0, 115.5]),
+            'fixed': array('b', [False, False, True]),
+            'customer_type': array('l', [0, 0, 2]),
+        }
+        # customer type 2 is a child of type 1
+        self.ancestors = {0: (), 2: (2, 1)}
+
+    def test_current_parameters(self):
+        totals = core.simulate(self.lines, self.templates, self.ancestors, {})
+        qty, revenue, new_revenue, margin, new_margin = totals[42]
+        self.assertEqual(qty, 17.0)
+        self.assertAlmostEqual(revenue, 5 * 132.0 + 10 * 121.0 + 2 * 115.5)
+        self.assertAlmostEqual(new_revenue, revenue)
+        self.assertAlmostEqual(margin, 5 * 22.0 + 10 * 11.0 + 2 * 5.5)
+        self.assertAlmostEqual(new_margin, margin)
+
+    def test_proposed_parameters(self):
+        scenario = {'operational_delta': 10.0, 'tier_delta': 5.0, 'customer_delta': 1.0, 'customer_type_id': 1}
+        totals = core.simulate(self.lines, self.templates, self.ancestors, scenario, group_by='customer_type')
+        # landing 120: tiers at 25% and 15%, inherited customer margin at 6%
+        self.assertAlmostEqual(totals[0][2], 5 * 150.0 + 10 * 138.0)
+        self.assertAlmostEqual(totals[2][2], 2 * 127.2)
+        self.assertAlmostEqual(totals[2][4], 2 * 7.2)
+
+    def test_line_without_rule_keeps_its_price(self):
+        self.lines['qty'][0] = 0.5
+        totals = core.simulate(self.lines, self.templates, self.ancestors, {'tier_delta': 50.0})
+        self.assertAlmostEqual(totals[42][2] - totals[42][1], 10 * 121.0 * 0.5 / 1.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Move the rows of the six legacy rule tables into product_pricing_rule.
+
+The legacy tables are dropped by the registry cleanup once their models are
+gone, after this script ran.
+"""
+
+import logging
+
+from odoo.tools.sql import table_exists
+
+_logger = logging.getLogger(__name__)
+
+# legacy table, family, rule kind
+LEGACY_TABLES = [
+    ('product_qty_pricing', 'regular', 'qty'),
+    ('product_customer_pricing', 'regular', 'customer'),
+    ('product_qty_lp_pricing', 'lp_based', 'qty'),
+    ('product_customer_lp_pricing', 'lp_based', 'customer'),
+    ('product_lp_purchase', 'lp_based_purchase', 'qty'),
+    ('product_customer_lp_purchase', 'lp_based_purchase', 'customer'),
+]
+
+
+def migrate(cr, version):
+    for table, family, rule_kind in LEGACY_TABLES:
+        if not table_exists(cr, table):
+            continue
+        if rule_kind == 'qty':
+            columns = "min_qty, max_qty, NULL"
+            # inverted tiers never matched any quantity
+            where = "COALESCE(max_qty, 0) = 0 OR max_qty >= COALESCE(min_qty, 0)"
+        else:
+            columns = "NULL, NULL, customer_type_id"
+            where = "TRUE"
+        # rows are inserted in id order: when legacy tiers overlap or customer
+        # types repeat, the first row wins, as it did in the order line lookup
+        cr.execute("""
+            INSERT INTO product_pricing_rule (
+                family, rule_kind, price_base, product_id, product_tmpl_id,
+                min_qty, max_qty, customer_type_id,
+                margin_per, amount, margin,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT %s, %s, %s, product_id, product_tmpl_id,
+                   {columns},
+                   margin_per, amount, margin,
+                   create_uid, create_date, write_uid, write_date
+              FROM {table}
+             WHERE ({where})
+               AND (product_id IS NOT NULL OR product_tmpl_id IS NOT NULL)
+          ORDER BY id
+                ON CONFLICT DO NOTHING
+        """.format(columns=columns, table=table, where=where), [family, rule_kind, 'landing' if family == 'regular' else 'mrp'])
+        migrated = cr.rowcount
+        cr.execute("SELECT count(*) FROM {table}".format(table=table))
+        skipped = cr.fetchone()[0] - migrated
+        _logger.info("Migrated %s rows of %s to product_pricing_rule", migrated, table)
+        if skipped:
+            _logger.warning("Skipped %s orphan, inverted, overlapping or duplicate rows of %s", skipped, table)
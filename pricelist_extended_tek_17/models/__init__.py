@@ -1,6 +1,13 @@
+from . import product_pricing_rule
+from . import product_price_change
+from . import product_price_grid
+from . import product_customer_price
 from . import product
+from . import product_pricelist
 from . import res_partner_customer_type
 from . import res_partner
 from . import res_user
 from . import  sale_order
-from . import account_move
\ No newline at end of file
+from . import account_move
+from . import pricing_stage_stat
+from . import pricing_cache
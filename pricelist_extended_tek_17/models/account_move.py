@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 
 class AccountMove(models.Model):
@@ -5,17 +7,29 @@ class AccountMove(models.Model):
 
     def action_post(self):
         res = super().action_post()
+        self._update_product_costs()
+        return res
 
+    def _update_product_costs(self):
+        """Update the last purchase price of the products of vendor bills.
+
+        The last bill line of a product wins. Templates are grouped by unit cost
+        so that the write (and the variant sync it triggers) runs once per
+        distinct cost instead of once per bill line.
+        """
+        unit_costs = {}
         for move in self:
             if move.move_type == 'in_invoice':  # Only vendor bills
                 for line in move.invoice_line_ids:
                     if line.product_id and line.quantity > 0:
-                        product = line.product_id.product_tmpl_id
-                        unit_cost = line.price_subtotal / line.quantity
-                        product.write({'last_purchase_price': unit_cost})
-                        product._compute_landing_price()
+                        unit_costs[line.product_id.product_tmpl_id] = line.price_subtotal / line.quantity
 
-                        if product.auto_sync_to_variants:
-                            product._sync_pricing_to_variants()
+        templates_by_cost = defaultdict(lambda: self.env['product.template'])
+        for template, unit_cost in unit_costs.items():
+            templates_by_cost[unit_cost] |= template
 
-        return res
+        with self.env['pricing.stage.sample']._profile('bill_cost_update') as sample:
+            sample['records'] = len(unit_costs)
+            # landing_price is recomputed and variants are synced by ProductTemplate.write
+            for unit_cost, templates in templates_by_cost.items():
+                templates.write({'last_purchase_price': unit_cost})
@@ -0,0 +1,198 @@
+import logging
+import sys
+import threading
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+# the worker cache is emptied when it grows past this number of entries
+MAX_CACHE_ENTRIES = 200000
+# number of best-selling products preloaded by the warm-up, 0 to disable it
+WARMUP_SIZE_PARAM = 'pricelist_extended_tek_17.pricing_cache_warmup_size'
+WARMUP_SALES_DAYS = 90
+WARMUP_BATCH_SIZE = 1000
+# models the pricing tables are built from
+PRICING_MODELS = ['product.template', 'product.pricing.rule', 'product.price.grid', 'product.price.grid.line']
+
+
+def _deep_size(value, seen=None):
+    """Approximate memory size of ``value`` and of the containers and values
+    it holds, in bytes"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_deep_size(item, seen) for item in value)
+    return size
+
+
+class PricingCacheSignal(models.Model):
+    """One row per committed transaction that changed pricing data.
+
+    The pricing cache version is the sum of the weights of the rows visible
+    to a transaction, so that it matches the pricing data this transaction
+    reads. A sequence, read outside of the transaction snapshot, could
+    announce changes that the transaction does not see yet.
+    """
+    _name = 'pricing.cache.signal'
+    _description = "Pricing Cache Signal"
+    _log_access = False
+
+    weight = fields.Integer(default=1)
+    warm_up = fields.Boolean(help="Ask all the workers to preload their pricing cache, e.g. after an import")
+
+    @api.autovacuum
+    def _gc_signals(self):
+        """Merge the rows into one, keeping the version unchanged"""
+        self.env.cr.execute("""
+            WITH gone AS (DELETE FROM pricing_cache_signal RETURNING weight)
+            INSERT INTO pricing_cache_signal (weight) SELECT sum(weight) FROM gone HAVING count(*) > 0
+        """)
+
+
+class PricingCache(models.AbstractModel):
+    """In-memory cache of pricing lookups, per worker and database.
+
+    The version of the cache is checked once per transaction, with one
+    query. When another worker committed pricing changes, the entries are
+    dropped. A transaction that changed pricing data does not use the cache
+    until it commits, so that other transactions never get its uncommitted
+    prices.
+
+    When enabled, a worker preloads the pricing tables of the best-selling
+    products in a background thread, started by its first lookup and again
+    when a bulk update asked for it, so that no request waits for it.
+    """
+    _name = 'pricing.cache'
+    _description = "Pricing Cache"
+
+    def _get_store(self):
+        registry = self.env.registry
+        if not hasattr(registry, '_pricing_cache'):
+            registry._pricing_cache = {'version': None, 'entries': {}, 'signal_id': 0, 'warm_up': True}
+        return registry._pricing_cache
+
+    @api.model
+    def _get_entries(self):
+        """Return the entries valid for the current transaction, or None when
+        the cache cannot be used by it."""
+        # pending pricing changes invalidate the cache when they are flushed:
+        # flush them first, so that computing the missing entries does not
+        # store values of this transaction in the shared cache
+        for model_name in PRICING_MODELS:
+            self.env[model_name].flush_model()
+        data = self.env.cr.precommit.data
+        if data.get('pricing.cache.changed'):
+            return None
+        store = self._get_store()
+        if 'pricing.cache.version' not in data:
+            self.env.cr.execute("""
+                SELECT COALESCE(sum(weight), 0), COALESCE(max(id), 0), COALESCE(bool_or(warm_up AND id > %s), FALSE)
+                  FROM pricing_cache_signal
+            """, [store['signal_id']])
+            version, signal_id, warm_up = self.env.cr.fetchone()
+            data['pricing.cache.version'] = version
+            store['signal_id'] = max(store['signal_id'], signal_id)
+            store['warm_up'] = store['warm_up'] or warm_up
+        version = data['pricing.cache.version']
+        if store['version'] != version:
+            if store['entries']:
+                _logger.debug("Pricing cache version %s -> %s, dropping %s entries",
+                              store['version'], version, len(store['entries']))
+            store['entries'] = {}
+            store['version'] = version
+        if store['warm_up']:
+            store['warm_up'] = False
+            self._start_warm_up()
+        return store['entries']
+
+    @api.model
+    def _start_warm_up(self):
+        """Run the warm-up in a thread with its own cursor, when enabled"""
+        size = int(self.env['ir.config_parameter'].sudo().get_param(WARMUP_SIZE_PARAM, 0) or 0)
+        if size <= 0 or self.env.registry.in_test_mode():
+            return
+        registry = self.env.registry
+
+        def warm_up():
+            threading.current_thread().dbname = registry.db_name
+            try:
+                with registry.cursor() as cr:
+                    api.Environment(cr, SUPERUSER_ID, {})['pricing.cache']._warm_up(size)
+            except Exception:
+                _logger.exception("Pricing cache warm-up failed")
+
+        threading.Thread(target=warm_up, name='pricing_cache_warm_up', daemon=True).start()
+
+    @api.model
+    def _warm_up(self, size):
+        """Preload the pricing tables of the ``size`` products sold the most
+        often over the last 90 days, and log the time and memory it took."""
+        start = time.monotonic()
+        self.env['sale.order.line'].flush_model(['product_id', 'state'])
+        self.env.cr.execute("""
+            SELECT p.product_tmpl_id
+              FROM sale_order_line l
+              JOIN product_product p ON p.id = l.product_id
+             WHERE l.state = 'sale' AND l.create_date >= %s
+          GROUP BY p.product_tmpl_id
+          ORDER BY count(*) DESC
+             LIMIT %s
+        """, [fields.Datetime.now() - timedelta(days=WARMUP_SALES_DAYS), size])
+        template_ids = [template_id for template_id, in self.env.cr.fetchall()]
+        Template = self.env['product.template']
+        tables = {}
+        for index in range(0, len(template_ids), WARMUP_BATCH_SIZE):
+            tables.update(Template._get_pricing_tables(template_ids[index:index + WARMUP_BATCH_SIZE]))
+        _logger.info("Pricing cache warmed up with %s products in %.2fs, %.1f KiB",
+                     len(tables), time.monotonic() - start, _deep_size(tables) / 1024)
+
+    @api.model
+    def _lookup(self, namespace, keys, compute):
+        """Return the value of each key of ``namespace``, computing the ones
+        missing from the cache with ``compute(keys)``, which returns a dict.
+        Cached values are shared: callers must not modify them."""
+        entries = self._get_entries()
+        if entries is None:
+            return compute(keys)
+        result = {}
+        missing = []
+        for key in keys:
+            value = entries.get((namespace, key))
+            if value is None:
+                missing.append(key)
+            else:
+                result[key] = value
+        if missing:
+            computed = compute(missing)
+            if len(entries) + len(computed) > MAX_CACHE_ENTRIES:
+                entries.clear()
+            for key, value in computed.items():
+                entries[namespace, key] = value
+            result.update(computed)
+        return result
+
+    @api.model
+    def _invalidate(self, warm_up=False):
+        """Pricing data changed: bypass the cache until the end of the
+        transaction, and signal the change to all workers at commit. Bulk
+        updates also ask the workers to preload their cache again."""
+        data = self.env.cr.precommit.data
+        data['pricing.cache.warm_up'] = data.get('pricing.cache.warm_up') or warm_up
+        if data.get('pricing.cache.changed'):
+            return
+        data['pricing.cache.changed'] = True
+        self.env.cr.precommit.add(self._signal_changes)
+
+    def _signal_changes(self):
+        self.env.cr.execute(
+            "INSERT INTO pricing_cache_signal (weight, warm_up) VALUES (1, %s)",
+            [bool(self.env.cr.precommit.data.get('pricing.cache.warm_up'))],
+        )
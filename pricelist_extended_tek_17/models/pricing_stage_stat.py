@@ -0,0 +1,110 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+
+PROFILING_PARAM = 'pricelist_extended_tek_17.pricing_profiling'
+
+
+class PricingStageSample(models.Model):
+    _name = 'pricing.stage.sample'
+    _description = "Pricing Stage Sample"
+    _order = 'id desc'
+    _log_access = False
+
+    stage = fields.Char("Stage", required=True, index=True, readonly=True)
+    duration = fields.Float("Duration (ms)", readonly=True)
+    record_count = fields.Integer("Records Touched", readonly=True)
+    query_count = fields.Integer("SQL Queries", readonly=True)
+    create_date = fields.Datetime("Date", readonly=True, index=True)
+    user_id = fields.Many2one('res.users', string="User", readonly=True)
+
+    @api.model
+    def _is_profiling_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(PROFILING_PARAM, 'False'))
+
+    @contextmanager
+    def _profile(self, stage):
+        """Measure the enclosed pricing stage when profiling is enabled.
+
+        Yields a dict in which the caller stores the number of records it
+        touched under ``records``. Samples are logged immediately and inserted
+        in one query when the transaction commits.
+        """
+        sample = {'records': 0}
+        if not self._is_profiling_enabled():
+            yield sample
+            return
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            duration = (time.perf_counter() - start) * 1000.0
+            query_count = cr.sql_log_count - queries
+            _logger.info(
+                "pricing stage %s: %.3f ms, %d records, %d queries",
+                stage, duration, sample['records'], query_count,
+            )
+            samples = cr.precommit.data.get('pricing.stage.samples')
+            if samples is None:
+                samples = cr.precommit.data['pricing.stage.samples'] = []
+                cr.precommit.add(self._flush_samples)
+            samples.append((stage, duration, sample['records'], query_count, self.env.uid))
+
+    def _flush_samples(self):
+        samples = self.env.cr.precommit.data.pop('pricing.stage.samples', [])
+        if not samples:
+            return
+        # append-only insert: concurrent transactions never contend on a row
+        query = """
+            INSERT INTO pricing_stage_sample (stage, duration, record_count, query_count, user_id, create_date)
+            VALUES {}
+        """.format(", ".join(["(%s, %s, %s, %s, %s, now() at time zone 'UTC')"] * len(samples)))
+        self.env.cr.execute(query, [value for sample in samples for value in sample])
+
+    @api.autovacuum
+    def _gc_samples(self):
+        """Remove the samples older than 30 days"""
+        limit_date = fields.Datetime.now() - timedelta(days=30)
+        self.search([('create_date', '<', limit_date)]).unlink()
+
+
+class PricingStageStat(models.Model):
+    _name = 'pricing.stage.stat'
+    _description = "Pricing Stage Statistics"
+    _auto = False
+    _order = 'total_duration desc'
+
+    stage = fields.Char("Stage", readonly=True)
+    call_count = fields.Integer("Calls", readonly=True)
+    record_count = fields.Integer("Records Touched", readonly=True)
+    query_count = fields.Integer("SQL Queries", readonly=True)
+    total_duration = fields.Float("Total Duration (ms)", readonly=True)
+    avg_duration = fields.Float("Average Duration (ms)", readonly=True, group_operator='avg')
+    max_duration = fields.Float("Max Duration (ms)", readonly=True, group_operator='max')
+    last_call = fields.Datetime("Last Call", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute("""
+            CREATE OR REPLACE VIEW pricing_stage_stat AS (
+                SELECT min(id) AS id,
+                       stage,
+                       count(*) AS call_count,
+                       sum(record_count) AS record_count,
+                       sum(query_count) AS query_count,
+                       sum(duration) AS total_duration,
+                       avg(duration) AS avg_duration,
+                       max(duration) AS max_duration,
+                       max(create_date) AS last_call
+                  FROM pricing_stage_sample
+              GROUP BY stage
+            )
+        """)
@@ -1,6 +1,9 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
-from odoo.exceptions import UserError
-from odoo.tools import float_round
+from odoo.tools import float_compare
+
+from ..lib.pricing_core import landing_price, rule_price
 
 
 class ProductTemplate(models.Model):
@@ -25,25 +28,57 @@ class ProductTemplate(models.Model):
     mrp_price = fields.Float("MRP Price")
     operational_margin = fields.Float("Operational Margin (%)")
     landing_price = fields.Float("Landing Price", compute="_compute_landing_price", store=True)
+    pricing_cost = fields.Float(
+        "LP Cost Basis", compute="_compute_pricing_cost", store=True, readonly=False,
+        help="Snapshot of the product cost that LP (manufacture) margins are measured against, "
+             "refreshed daily instead of on every stock valuation change."
+    )
+    price_grid_id = fields.Many2one(
+        'product.price.grid', string="Price Grid", index='btree_not_null',
+        domain="[('family', '=', pricing_type)]",
+        help="Shared tiers and customer type margins, used for the rule kinds this product has no own rules for"
+    )
 
+    pricing_rule_ids = fields.One2many(
+        'product.pricing.rule', 'product_tmpl_id', string="Pricing Rules"
+    )
     qty_pricing_ids = fields.One2many(
-        'product.qty.pricing', 'product_tmpl_id', string="Quantity Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Quantity Pricing",
+        domain=[('family', '=', 'regular'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'regular', 'default_rule_kind': 'qty'},
     )
     customer_pricing_ids = fields.One2many(
-        'product.customer.pricing', 'product_tmpl_id', string="Customer Type Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Customer Type Pricing",
+        domain=[('family', '=', 'regular'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'regular', 'default_rule_kind': 'customer'},
     )
-
     qty_lp_pricing_ids = fields.One2many(
-        'product.qty.lp.pricing', 'product_tmpl_id', string="Quantity LP Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Quantity LP Pricing",
+        domain=[('family', '=', 'lp_based'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'lp_based', 'default_rule_kind': 'qty'},
     )
     customer_lp_pricing_ids = fields.One2many(
-        'product.customer.lp.pricing', 'product_tmpl_id', string="Customer Type LP Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Customer Type LP Pricing",
+        domain=[('family', '=', 'lp_based'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'lp_based', 'default_rule_kind': 'customer'},
     )
     qty_lp_purchase_ids = fields.One2many(
-        'product.lp.purchase', 'product_tmpl_id', string="Quantity LP Purchase Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Quantity LP Purchase Pricing",
+        domain=[('family', '=', 'lp_based_purchase'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'lp_based_purchase', 'default_rule_kind': 'qty'},
     )
     customer_lp_purchase_ids = fields.One2many(
-        'product.customer.lp.purchase', 'product_tmpl_id', string="Customer Type LP Purchase Pricing"
+        'product.pricing.rule', 'product_tmpl_id', string="Customer Type LP Purchase Pricing",
+        domain=[('family', '=', 'lp_based_purchase'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'lp_based_purchase', 'default_rule_kind': 'customer'},
+    )
+
+    qty_rule_count = fields.Integer("Quantity Rules", compute="_compute_pricing_rule_counts")
+    customer_rule_count = fields.Integer("Customer Type Rules", compute="_compute_pricing_rule_counts")
+
+    customer_price_ids = fields.One2many(
+        'product.customer.price', 'product_tmpl_id', string="Customer Type Prices",
+        help="Stored customer type and first tier prices, to search products by price",
     )
 
     # New field to control auto-sync
@@ -56,8 +91,57 @@ class ProductTemplate(models.Model):
     @api.depends('last_purchase_price', 'operational_margin')
     def _compute_landing_price(self):
         for rec in self:
-            rec.landing_price = rec.last_purchase_price * (
-                    1 + (rec.operational_margin / 100)) if rec.last_purchase_price else 0.0
+            rec.landing_price = landing_price(rec.last_purchase_price, rec.operational_margin)
+
+    @api.depends('pricing_type')
+    def _compute_pricing_cost(self):
+        # initial snapshot only, standard_price changes go through _refresh_pricing_cost
+        for rec in self:
+            rec.pricing_cost = rec.standard_price
+
+    def _compute_pricing_rule_counts(self):
+        """Number of rules of the current pricing family, per rule kind, with
+        one grouped query instead of reading the rules"""
+        counts = {
+            (owner.id, family, rule_kind): count
+            for owner, family, rule_kind, count in self.env['product.pricing.rule']._read_group(
+                [('product_tmpl_id', 'in', self._origin.ids)], ['product_tmpl_id', 'family', 'rule_kind'], ['__count'])
+        }
+        for rec in self:
+            rec.qty_rule_count = counts.get((rec._origin.id, rec.pricing_type, 'qty'), 0)
+            rec.customer_rule_count = counts.get((rec._origin.id, rec.pricing_type, 'customer'), 0)
+
+    def action_open_qty_rules(self):
+        self.ensure_one()
+        return self.env['product.pricing.rule']._get_rules_action('product_tmpl_id', self, 'qty')
+
+    def action_open_customer_rules(self):
+        self.ensure_one()
+        return self.env['product.pricing.rule']._get_rules_action('product_tmpl_id', self, 'customer')
+
+    def _refresh_pricing_cost(self):
+        """Align the cost snapshot with the current cost. Only the products
+        whose cost changed are written, grouped by cost, so that the margins
+        of their LP rules are recomputed once."""
+        products_by_cost = defaultdict(lambda: self.browse())
+        for rec in self:
+            if float_compare(rec.pricing_cost, rec.standard_price, precision_digits=2):
+                products_by_cost[rec.standard_price] |= rec
+        for cost, products in products_by_cost.items():
+            products.write({'pricing_cost': cost})
+
+    def load(self, fields, data):
+        result = super().load(fields, data)
+        if result.get('ids'):
+            self.env['pricing.cache']._invalidate(warm_up=True)
+        return result
+
+    def _write(self, vals):
+        # stored landing prices are written here when flushed
+        if {'landing_price', 'mrp_price', 'pricing_type', 'price_grid_id'}.intersection(vals):
+            self.env['product.customer.price']._mark_templates(self)
+            self.env['pricing.cache']._invalidate()
+        return super()._write(vals)
 
     def write(self, vals):
         """Override write to sync changes to variants"""
@@ -69,16 +153,9 @@ class ProductTemplate(models.Model):
             'landing_price', 'auto_sync_to_variants'
         ]
 
-        # Check if any sync field was modified or any pricing tables were modified
-        should_sync = (
-                any(field in vals for field in sync_fields) or
-                'qty_pricing_ids' in vals or
-                'customer_pricing_ids' in vals or
-                'qty_lp_pricing_ids' in vals or
-                'customer_lp_pricing_ids' in vals or
-                'qty_lp_purchase_ids' in vals or
-                'customer_lp_purchase_ids' in vals
-        )
+        # Check if any sync field was modified, the pricing rules sync their
+        # variants themselves when they are created, modified or deleted
+        should_sync = any(field in vals for field in sync_fields)
 
         if should_sync:
             for template in self:
@@ -97,116 +174,101 @@ class ProductTemplate(models.Model):
 
     def _sync_pricing_to_variants(self):
         """Sync pricing data from template to all variants"""
-        for template in self:
-            variants = template.product_variant_ids.filtered(lambda v: not v.has_custom_pricing)
-            if not variants:
+        with self.env['pricing.stage.sample']._profile('variant_sync') as sample:
+            for template in self:
+                variants = template.product_variant_ids.filtered(lambda v: not v.has_custom_pricing)
+                if not variants:
+                    continue
+                sample['records'] += len(variants)
+
+                # Sync basic pricing fields with context to avoid marking as custom
+                variant_vals = {
+                    'pricing_type': template.pricing_type,
+                    'last_purchase_price': template.last_purchase_price,
+                    'operational_margin': template.operational_margin,
+                    'landing_price': template.landing_price,
+                    'mrp_price': template.mrp_price,
+                }
+
+                # Use context to indicate this is template sync
+                variants.with_context(sync_from_template=True).write(variant_vals)
+
+                # Sync the pricing rules of all pricing types
+                template._sync_pricing_rules_to_variants(variants)
+
+    def _sync_pricing_rules_to_variants(self, variants):
+        """Replace the pricing rules of the variants by copies of the template rules"""
+        with self.env['pricing.stage.sample']._profile('variant_sync_rules') as sample:
+            variants.pricing_rule_ids.with_context(sync_from_template=True).unlink()
+            vals_list = [rule._prepare_variant_vals(variant) for variant in variants for rule in self.pricing_rule_ids]
+            if vals_list:
+                self.env['product.pricing.rule'].with_context(sync_from_template=True).create(vals_list)
+                sample['records'] += len(vals_list)
+
+    @api.model
+    def _get_pricing_tables(self, template_ids):
+        """Return the (quantity rows, {customer type id: [row]}) pricing
+        tables of each template id, kept in the worker pricing cache. Rows
+        are (min qty, max qty, price, rule id, family, rule kind, margin,
+        base price) tuples."""
+        return self.env['pricing.cache']._lookup('pricing_tables', template_ids, self._build_pricing_tables)
+
+    @api.model
+    def _build_pricing_tables(self, template_ids):
+        """Pricing tables from the own rules of the templates of their current
+        pricing type, else from their price grid, with one search for all"""
+        templates = self.browse(template_ids)
+        qty_tables = {template_id: [] for template_id in template_ids}
+        customer_tables = {template_id: {} for template_id in template_ids}
+        own_rule_kinds = set()
+        for rule in self.env['product.pricing.rule'].search([('product_tmpl_id', 'in', templates.ids)]):
+            template = rule.product_tmpl_id
+            if rule.family != template.pricing_type:
                 continue
+            own_rule_kinds.add((template.id, rule.rule_kind))
+            base_price = template.landing_price if rule.price_base == 'landing' else template.mrp_price
+            # rules are ordered by min qty
+            if rule.rule_kind == 'qty':
+                qty_tables[template.id].append(
+                    (rule.min_qty, rule.max_qty, rule.amount, rule.id, rule.family, rule.rule_kind,
+                     rule.margin_per, base_price))
+            else:
+                customer_tables[template.id][rule.customer_type_id.id] = (
+                    (0.0, 0.0, rule.amount, rule.id, rule.family, rule.rule_kind, rule.margin_per, base_price),)
+
+        # shared grid rules, for the rule kinds a product has no own rules for
+        for template in templates.filtered(lambda t: t.price_grid_id.active and t.price_grid_id.family == t.pricing_type):
+            base_price = template.landing_price if template.pricing_type == 'regular' else template.mrp_price
+            for grid_line in template.price_grid_id.line_ids:
+                if (template.id, grid_line.rule_kind) in own_rule_kinds:
+                    continue
+                price = rule_price(template.pricing_type, template.landing_price, template.mrp_price,
+                                   grid_line.margin_per)
+                row = (grid_line.min_qty, grid_line.max_qty, price, False, template.pricing_type,
+                       grid_line.rule_kind, grid_line.margin_per, base_price)
+                if grid_line.rule_kind == 'qty':
+                    qty_tables[template.id].append(row)
+                else:
+                    customer_tables[template.id][grid_line.customer_type_id.id] = (row,)
+        # tuples take less memory in the cache and cannot be modified by callers
+        return {
+            template_id: (tuple(qty_tables[template_id]), customer_tables[template_id])
+            for template_id in template_ids
+        }
 
-            # Sync basic pricing fields with context to avoid marking as custom
-            variant_vals = {
-                'pricing_type': template.pricing_type,
-                'last_purchase_price': template.last_purchase_price,
-                'operational_margin': template.operational_margin,
-                'landing_price': template.landing_price,
-                'mrp_price': template.mrp_price,
-            }
+    def action_refresh_pricing_cost(self):
+        self._refresh_pricing_cost()
+        self.product_variant_ids._refresh_pricing_cost()
 
-            # Use context to indicate this is template sync
-            variants.with_context(sync_from_template=True).write(variant_vals)
-
-            # Sync all pricing types
-            template._sync_qty_pricing_to_variants(variants)
-            template._sync_customer_pricing_to_variants(variants)
-            template._sync_lp_purchase_pricing_to_variants(variants)
-
-    def _sync_qty_pricing_to_variants(self, variants):
-        """Sync quantity pricing to variants"""
-        for variant in variants:
-            # Remove existing variant quantity pricing
-            variant.qty_pricing_ids.unlink()
-            variant.qty_lp_pricing_ids.unlink()
-            variant.qty_lp_purchase_ids.unlink()
-
-            # Sync regular quantity pricing
-            if self.qty_pricing_ids:
-                for qty_pricing in self.qty_pricing_ids:
-                    self.env['product.qty.pricing'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'min_qty': qty_pricing.min_qty,
-                        'max_qty': qty_pricing.max_qty,
-                        'margin_per': qty_pricing.margin_per,
-                    })
-
-            # Sync LP quantity pricing
-            if self.qty_lp_pricing_ids:
-                for qty_pricing in self.qty_lp_pricing_ids:
-                    self.env['product.qty.lp.pricing'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'min_qty': qty_pricing.min_qty,
-                        'max_qty': qty_pricing.max_qty,
-                        'margin_per': qty_pricing.margin_per,
-                    })
-
-            # Sync LP Purchase quantity pricing
-            if self.qty_lp_purchase_ids:
-                for qty_pricing in self.qty_lp_purchase_ids:
-                    self.env['product.lp.purchase'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'min_qty': qty_pricing.min_qty,
-                        'max_qty': qty_pricing.max_qty,
-                        'margin_per': qty_pricing.margin_per,
-                    })
-
-    def _sync_customer_pricing_to_variants(self, variants):
-        """Sync customer pricing to variants"""
-        for variant in variants:
-            # Remove existing variant customer pricing
-            variant.customer_pricing_ids.unlink()
-            variant.customer_lp_pricing_ids.unlink()
-            variant.customer_lp_purchase_ids.unlink()
-
-            # Sync regular customer pricing
-            if self.customer_pricing_ids:
-                for customer_pricing in self.customer_pricing_ids:
-                    self.env['product.customer.pricing'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'customer_type_id': customer_pricing.customer_type_id.id,
-                        'margin_per': customer_pricing.margin_per,
-                    })
-
-            # Sync LP customer pricing
-            if self.customer_lp_pricing_ids:
-                for customer_pricing in self.customer_lp_pricing_ids:
-                    self.env['product.customer.lp.pricing'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'customer_type_id': customer_pricing.customer_type_id.id,
-                        'margin_per': customer_pricing.margin_per,
-                    })
-
-    def _sync_lp_purchase_pricing_to_variants(self, variants):
-        """Sync LP Purchase customer pricing to variants"""
-        for variant in variants:
-            # Remove existing variant LP Purchase customer pricing (already done in _sync_customer_pricing_to_variants)
-            # This method is called for additional LP Purchase pricing logic if needed
-
-            # Sync LP Purchase customer pricing
-            if self.customer_lp_purchase_ids:
-                for customer_pricing in self.customer_lp_purchase_ids:
-                    self.env['product.customer.lp.purchase'].with_context(sync_from_template=True).create({
-                        'product_id': variant.id,
-                        'product_tmpl_id': False,  # Clear template reference
-                        'customer_type_id': customer_pricing.customer_type_id.id,
-                        'margin_per': customer_pricing.margin_per,
-                    })
+    @api.model
+    def _cron_refresh_pricing_cost(self):
+        self.search([('pricing_type', '=', 'lp_based')])._refresh_pricing_cost()
+        self.env['product.product'].search([('pricing_type', '=', 'lp_based')])._refresh_pricing_cost()
 
     def action_sync_all_variants(self):
         """Manual action to sync all variants"""
         self._sync_pricing_to_variants()
+        self.env['pricing.cache']._invalidate(warm_up=True)
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
@@ -241,28 +303,49 @@ class ProductProduct(models.Model):
     last_purchase_price = fields.Float("Last Purchase Price")
     operational_margin = fields.Float("Operational Margin (%)")
     landing_price = fields.Float("Landing Price", compute="_compute_landing_price", store=True)
+    pricing_cost = fields.Float(
+        "LP Cost Basis", compute="_compute_pricing_cost", store=True, readonly=False,
+        help="Snapshot of the product cost that LP (manufacture) margins are measured against, "
+             "refreshed daily instead of on every stock valuation change."
+    )
 
+    pricing_rule_ids = fields.One2many(
+        'product.pricing.rule', 'product_id', string="Pricing Rules"
+    )
     qty_pricing_ids = fields.One2many(
-        'product.qty.pricing', 'product_id', string="Quantity Pricing"
+        'product.pricing.rule', 'product_id', string="Quantity Pricing",
+        domain=[('family', '=', 'regular'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'regular', 'default_rule_kind': 'qty'},
     )
     customer_pricing_ids = fields.One2many(
-        'product.customer.pricing', 'product_id', string="Customer Pricing"
+        'product.pricing.rule', 'product_id', string="Customer Pricing",
+        domain=[('family', '=', 'regular'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'regular', 'default_rule_kind': 'customer'},
     )
-
     qty_lp_pricing_ids = fields.One2many(
-        'product.qty.lp.pricing', 'product_id', string="Quantity LP Pricing"
+        'product.pricing.rule', 'product_id', string="Quantity LP Pricing",
+        domain=[('family', '=', 'lp_based'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'lp_based', 'default_rule_kind': 'qty'},
     )
     customer_lp_pricing_ids = fields.One2many(
-        'product.customer.lp.pricing', 'product_id', string="Customer Type LP Pricing"
+        'product.pricing.rule', 'product_id', string="Customer Type LP Pricing",
+        domain=[('family', '=', 'lp_based'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'lp_based', 'default_rule_kind': 'customer'},
     )
-
     qty_lp_purchase_ids = fields.One2many(
-        'product.lp.purchase', 'product_id', string="Quantity LP Purchase Pricing"
+        'product.pricing.rule', 'product_id', string="Quantity LP Purchase Pricing",
+        domain=[('family', '=', 'lp_based_purchase'), ('rule_kind', '=', 'qty')],
+        context={'default_family': 'lp_based_purchase', 'default_rule_kind': 'qty'},
     )
     customer_lp_purchase_ids = fields.One2many(
-        'product.customer.lp.purchase', 'product_id', string="Customer Type LP Purchase Pricing"
+        'product.pricing.rule', 'product_id', string="Customer Type LP Purchase Pricing",
+        domain=[('family', '=', 'lp_based_purchase'), ('rule_kind', '=', 'customer')],
+        context={'default_family': 'lp_based_purchase', 'default_rule_kind': 'customer'},
     )
 
+    qty_rule_count = fields.Integer("Quantity Rules", compute="_compute_pricing_rule_counts")
+    customer_rule_count = fields.Integer("Customer Type Rules", compute="_compute_pricing_rule_counts")
+
     # Field to track if variant has custom pricing
     has_custom_pricing = fields.Boolean(
         string="Has Custom Pricing",
@@ -273,14 +356,50 @@ class ProductProduct(models.Model):
     @api.depends('last_purchase_price', 'operational_margin')
     def _compute_landing_price(self):
         for rec in self:
-            rec.landing_price = rec.last_purchase_price * (
-                    1 + (rec.operational_margin / 100)) if rec.last_purchase_price else 0.0
+            rec.landing_price = landing_price(rec.last_purchase_price, rec.operational_margin)
+
+    @api.depends('pricing_type')
+    def _compute_pricing_cost(self):
+        # initial snapshot only, standard_price changes go through _refresh_pricing_cost
+        for rec in self:
+            rec.pricing_cost = rec.standard_price
+
+    def _compute_pricing_rule_counts(self):
+        """Number of rules of the current pricing family, per rule kind, with
+        one grouped query instead of reading the rules"""
+        counts = {
+            (owner.id, family, rule_kind): count
+            for owner, family, rule_kind, count in self.env['product.pricing.rule']._read_group(
+                [('product_id', 'in', self._origin.ids)], ['product_id', 'family', 'rule_kind'], ['__count'])
+        }
+        for rec in self:
+            rec.qty_rule_count = counts.get((rec._origin.id, rec.pricing_type, 'qty'), 0)
+            rec.customer_rule_count = counts.get((rec._origin.id, rec.pricing_type, 'customer'), 0)
+
+    def action_open_qty_rules(self):
+        self.ensure_one()
+        return self.env['product.pricing.rule']._get_rules_action('product_id', self, 'qty')
+
+    def action_open_customer_rules(self):
+        self.ensure_one()
+        return self.env['product.pricing.rule']._get_rules_action('product_id', self, 'customer')
+
+    def _refresh_pricing_cost(self):
+        """Align the cost snapshot with the current cost. Only the products
+        whose cost changed are written, grouped by cost, so that the margins
+        of their LP rules are recomputed once."""
+        products_by_cost = defaultdict(lambda: self.browse())
+        for rec in self:
+            if float_compare(rec.pricing_cost, rec.standard_price, precision_digits=2):
+                products_by_cost[rec.standard_price] |= rec
+        for cost, products in products_by_cost.items():
+            products.write({'pricing_cost': cost})
 
     def write(self, vals):
         """Override write to mark variant as having custom pricing if manually modified"""
         pricing_fields = [
             'pricing_type', 'last_purchase_price', 'operational_margin', 'mrp_price',
-            'qty_pricing_ids', 'customer_pricing_ids',
+            'pricing_rule_ids', 'qty_pricing_ids', 'customer_pricing_ids',
             'qty_lp_pricing_ids', 'customer_lp_pricing_ids',
             'qty_lp_purchase_ids', 'customer_lp_purchase_ids'
         ]
@@ -291,6 +410,9 @@ class ProductProduct(models.Model):
 
         return super(ProductProduct, self).write(vals)
 
+    def action_refresh_pricing_cost(self):
+        self._refresh_pricing_cost()
+
     def action_reset_to_template_pricing(self):
         """Action to reset variant pricing to template pricing"""
         for variant in self:
@@ -583,378 +705,6 @@ class ProductProduct(models.Model):
 #         }
 
 
-class ProductQtyPricing(models.Model):
-    _name = 'product.qty.pricing'
-    _description = "Product Quantity Based Pricing"
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    wizard_id = fields.Many2one('price.details.wizard')
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    min_qty = fields.Float("Min Qty")
-    max_qty = fields.Float("Max Qty")
-    margin_per = fields.Float("Margin (%)")
-    amount = fields.Float("Sale Price", compute="_compute_amount", store=True)
-    margin = fields.Float("Margin (₹)", compute="_compute_margin", store=True)
-
-    @api.depends('product_id.landing_price', 'product_tmpl_id.landing_price', 'margin_per')
-    def _compute_amount(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            # rec.amount = base_price * (1 + (rec.margin_per / 100)) if base_price else 0.0
-            if base_price:
-                price = base_price * (1 + (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-
-    @api.depends('amount', 'product_id.landing_price', 'product_tmpl_id.landing_price')
-    def _compute_margin(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            # rec.margin = rec.amount - base_price if base_price else 0.0
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template qty pricing is modified"""
-        result = super(ProductQtyPricing, self).write(vals)
-
-        # Only sync if this is a template record and sync is enabled
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_qty_pricing_to_variants(variants_to_sync)
-        return result
-
-
-class ProductCustomerPricing(models.Model):
-    _name = 'product.customer.pricing'
-    _description = "Product Customer Type Pricing"
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    wizard_id = fields.Many2one('price.details.wizard')
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    customer_type_id = fields.Many2one(
-        'res.partner.customer.type',
-        string="Customer Type"
-    )
-
-    margin_per = fields.Float("Margin (%)")
-    amount = fields.Float("Sale Price", compute="_compute_amount", store=True)
-    margin = fields.Float("Margin (₹)", compute="_compute_margin", store=True)
-
-    @api.depends('product_id.landing_price', 'product_tmpl_id.landing_price', 'margin_per')
-    def _compute_amount(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            # rec.amount = base_price * (1 + (rec.margin_per / 100)) if base_price else 0.0
-            if base_price:
-                price = base_price * (1 + (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-    @api.depends('amount', 'product_id.landing_price', 'product_tmpl_id.landing_price')
-    def _compute_margin(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            # rec.margin = rec.amount - base_price if base_price else 0.0
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template customer pricing is modified"""
-        result = super(ProductCustomerPricing, self).write(vals)
-
-        # Only sync if this is a template record and sync is enabled
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_customer_pricing_to_variants(variants_to_sync)
-        return result
-
-
-class ProductQtyLpPricing(models.Model):
-    _name = 'product.qty.lp.pricing'
-    _description = "Product Quantity LP Based Pricing"
-
-    wizard_id = fields.Many2one('price.details.wizard')
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    min_qty = fields.Float("Min Qty")
-    max_qty = fields.Float("Max Qty")
-    margin_per = fields.Float("Discount (%)")
-    amount = fields.Float("Sale Price", compute="_compute_lp_amount", store=True)
-    margin = fields.Float("Margin (₹)", compute="_compute_lp_margin", store=True)
-
-    @api.depends('product_id.mrp_price', 'product_tmpl_id.mrp_price', 'margin_per')
-    def _compute_lp_amount(self):
-        for rec in self:
-            base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            # rec.amount = base_price * (1 - (rec.margin_per / 100)) if base_price else 0.0
-            if base_price:
-                price = base_price * (1 - (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-
-    @api.depends('amount', 'product_id.standard_price', 'product_tmpl_id.standard_price')
-    def _compute_lp_margin(self):
-        for rec in self:
-            base_price = rec.product_id.standard_price or rec.product_tmpl_id.standard_price
-            # rec.margin = abs(rec.amount - base_price) if base_price else 0.0
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template qty LP pricing is modified"""
-        result = super(ProductQtyLpPricing, self).write(vals)
-
-        # Only sync if this is a template record and sync is enabled
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_qty_pricing_to_variants(variants_to_sync)
-        return result
-
-
-class ProductCustomerLpPricing(models.Model):
-    _name = 'product.customer.lp.pricing'
-    _description = "Product Customer Type LP Pricing"
-
-    wizard_id = fields.Many2one('price.details.wizard')
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    customer_type_id = fields.Many2one(
-        'res.partner.customer.type',
-        string="Customer Type"
-    )
-
-    margin_per = fields.Float("Discount (%)")
-    amount = fields.Float("Sale Price", compute="_compute_lp_amount", store=True)
-    margin = fields.Float("Margin  (₹)", compute="_compute_lp_margin", store=True)
-
-    @api.depends('product_id.mrp_price', 'product_tmpl_id.mrp_price', 'margin_per')
-    def _compute_lp_amount(self):
-        for rec in self:
-            # base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            # rec.amount = base_price * (1 - (rec.margin_per / 100)) if base_price else 0.0
-            base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            if base_price:
-                price = base_price * (1 - (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-
-    @api.depends('amount', 'product_id.standard_price', 'product_tmpl_id.standard_price')
-    def _compute_lp_margin(self):
-        for rec in self:
-
-            base_price = rec.product_id.standard_price or rec.product_tmpl_id.standard_price
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template customer LP pricing is modified"""
-        result = super(ProductCustomerLpPricing, self).write(vals)
-
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_customer_pricing_to_variants(variants_to_sync)
-        return result
-
-
-class ProductLpPurchase(models.Model):
-    _name = 'product.lp.purchase'
-    _description = "Product LP Purchase"
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    min_qty = fields.Float("Min Qty")
-    max_qty = fields.Float("Max Qty")
-    margin_per = fields.Float("Discount (%)")
-    amount = fields.Float("Sale Price", compute="_compute_amount", store=True)
-    margin = fields.Float("Margin (₹)", compute="_compute_margin", store=True)
-
-    @api.depends('product_id.mrp_price', 'product_tmpl_id.mrp_price', 'margin_per')
-    def _compute_amount(self):
-        for rec in self:
-            # base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            # rec.amount = base_price * (1 - (rec.margin_per / 100)) if base_price else 0.0
-            base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            if base_price:
-                price = base_price * (1 - (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-
-    @api.depends('amount', 'product_id.landing_price', 'product_tmpl_id.landing_price')
-    def _compute_margin(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template qty pricing is modified"""
-        result = super().write(vals)
-
-        # Only sync if this is a template record and sync is enabled
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_qty_pricing_to_variants(variants_to_sync)
-        return result
-
-
-class ProductCustomerLPPurchase(models.Model):
-    _name = 'product.customer.lp.purchase'
-    _description = "Product Customer LP Purchase"
-
-    is_pricelist_user = fields.Boolean(
-        string="Is Pricelist User",
-        compute="_compute_is_pricelist_user",
-        store=False
-    )
-
-    def _compute_is_pricelist_user(self):
-        for user in self:
-            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
-
-    product_id = fields.Many2one('product.product', string="Product Variant")
-    product_tmpl_id = fields.Many2one('product.template', string="Product Template")
-
-    customer_type_id = fields.Many2one(
-        'res.partner.customer.type',
-        string="Customer Type"
-    )
-
-    margin_per = fields.Float("Discount (%)")
-    amount = fields.Float("Sale Price", compute="_compute_amount", store=True)
-    margin = fields.Float("Margin (₹)", compute="_compute_margin", store=True)
-
-    @api.depends('product_id.mrp_price', 'product_tmpl_id.mrp_price', 'margin_per')
-    def _compute_amount(self):
-        for rec in self:
-            # base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            # rec.amount = base_price * (1 - (rec.margin_per / 100)) if base_price else 0.0
-            base_price = rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price
-            if base_price:
-                price = base_price * (1 - (rec.margin_per / 100))
-                rec.amount = float_round(price, precision_digits=2)  # ✅ ensure 2-decimal consistency
-            else:
-                rec.amount = 0.0
-
-    @api.depends('amount', 'product_id.landing_price', 'product_tmpl_id.landing_price')
-    def _compute_margin(self):
-        for rec in self:
-            base_price = rec.product_id.landing_price or rec.product_tmpl_id.landing_price
-            if base_price:
-                price = abs(rec.amount - base_price)
-                rec.margin = float_round(price, precision_digits=2)
-            else:
-                rec.margin = 0.0
-
-    def write(self, vals):
-        """Trigger sync to variants when template customer pricing is modified"""
-        result = super().write(vals)
-
-        # Only sync if this is a template record and sync is enabled
-        for rec in self.filtered(lambda r: r.product_tmpl_id and not self._context.get('sync_from_template')):
-            if rec.product_tmpl_id.auto_sync_to_variants:
-                variants_to_sync = rec.product_tmpl_id.product_variant_ids.filtered(
-                    lambda v: not v.has_custom_pricing
-                )
-                if variants_to_sync:
-                    rec.product_tmpl_id._sync_customer_pricing_to_variants(variants_to_sync)
-        return result
-
-
 # class ProductLpPurchase(models.Model):
 #     _name = 'product.lp.purchase'
 #     _description = "Product LP Purchase"
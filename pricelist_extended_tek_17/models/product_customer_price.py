@@ -0,0 +1,144 @@
+from odoo import models, fields, api, tools
+
+from ..lib.pricing_core import rule_price
+from .product_pricing_rule import PRICING_FAMILIES
+
+# templates are recomputed by batches of this size
+REFRESH_BATCH_SIZE = 1000
+
+
+class ProductCustomerPrice(models.Model):
+    """Effective price of each product template per customer type, and its
+    first quantity tier price, stored for searching and sorting in SQL.
+
+    Rows hold the price the pricing rules would give: the own rules of the
+    template, else its price grid, with the customer type falling back to
+    its nearest ancestor type. Templates touched by rule, grid, base price or
+    hierarchy changes are collected during the transaction and recomputed
+    in batch at commit.
+    """
+    _name = 'product.customer.price'
+    _description = "Product Price per Customer Type"
+    _order = 'price, id'
+    _rec_name = 'product_tmpl_id'
+    _log_access = False
+
+    product_tmpl_id = fields.Many2one('product.template', string="Product", readonly=True, required=True,
+                                      index=True, ondelete='cascade')
+    categ_id = fields.Many2one(related='product_tmpl_id.categ_id', string="Product Category")
+    family = fields.Selection(PRICING_FAMILIES, string="Pricing Type", readonly=True)
+    price_kind = fields.Selection([
+        ('customer', 'Customer Type'),
+        ('first_tier', 'First Quantity Tier'),
+    ], string="Price", readonly=True, required=True)
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type", readonly=True,
+                                       ondelete='cascade')
+    price = fields.Float("Sale Price", readonly=True)
+
+    def init(self):
+        tools.create_index(self.env.cr, 'product_customer_price_kind_type_price_index', self._table,
+                           ['price_kind', 'customer_type_id', 'price'])
+
+    @api.model
+    def _mark_templates(self, templates):
+        """Recompute the prices of ``templates`` when the transaction commits"""
+        if not templates:
+            return
+        dirty = self._get_dirty()
+        if dirty is not True:
+            dirty.update(templates._origin.ids)
+
+    @api.model
+    def _mark_all(self):
+        """Recompute the prices of all the templates when the transaction commits"""
+        self._get_dirty()
+        self.env.cr.precommit.data['product.customer.price.templates'] = True
+
+    def _get_dirty(self):
+        cr = self.env.cr
+        dirty = cr.precommit.data.get('product.customer.price.templates')
+        if dirty is None:
+            dirty = cr.precommit.data['product.customer.price.templates'] = set()
+            cr.precommit.add(self.sudo()._flush_dirty)
+        return dirty
+
+    def _flush_dirty(self):
+        dirty = self.env.cr.precommit.data.pop('product.customer.price.templates', set())
+        if dirty is True:
+            self._refresh_all()
+        elif dirty:
+            self._refresh(self.env['product.template'].browse(dirty).exists())
+
+    @api.model
+    def _refresh_all(self):
+        Template = self.env['product.template'].with_context(active_test=False)
+        template_ids = Template.search([]).ids
+        for index in range(0, len(template_ids), REFRESH_BATCH_SIZE):
+            self._refresh(Template.browse(template_ids[index:index + REFRESH_BATCH_SIZE]))
+
+    @api.model
+    def _refresh(self, templates):
+        """Replace the prices of ``templates``, resolved with one query per
+        rule kind for all of them."""
+        if not templates:
+            return
+        templates.fetch(['pricing_type'])
+        type_ids = self.env['res.partner.customer.type'].with_context(active_test=False).search([]).ids
+        customer_keys = {
+            (template.id, template.pricing_type, type_id)
+            for template in templates for type_id in type_ids
+        }
+
+        Rule = self.env['product.pricing.rule']
+        rules = Rule._find_customer_rules('product_tmpl_id', customer_keys)
+        amounts = {key: rule.amount for key, rule in rules.items()}
+        amounts.update(self.env['product.price.grid']._find_amounts(
+            'customer', {key for key in customer_keys if key not in rules}))
+        rows = [
+            (template_id, family, 'customer', type_id, amount)
+            for (template_id, family, type_id), amount in amounts.items() if amount
+        ]
+        rows += [
+            (template_id, family, 'first_tier', None, amount)
+            for template_id, (family, amount) in self._find_first_tier_amounts(templates).items() if amount
+        ]
+
+        cr = self.env.cr
+        cr.execute("DELETE FROM product_customer_price WHERE product_tmpl_id = ANY(%s)", [templates.ids])
+        if rows:
+            cr.execute("""
+                INSERT INTO product_customer_price (product_tmpl_id, family, price_kind, customer_type_id, price)
+                SELECT * FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::int[], %s::float8[])
+            """, list(map(list, zip(*rows))))
+        self.invalidate_model()
+
+    @api.model
+    def _find_first_tier_amounts(self, templates):
+        """Return the (family, price) of the quantity tier with the lowest
+        minimum quantity of each template, from its own rules of its pricing
+        type, else from its price grid, with one query each."""
+        self.env['product.template'].flush_model(['pricing_type', 'price_grid_id', 'landing_price', 'mrp_price'])
+        self.env['product.pricing.rule'].flush_model(['product_tmpl_id', 'family', 'rule_kind', 'min_qty', 'amount'])
+        self.env['product.price.grid'].flush_model(['family', 'active'])
+        self.env['product.price.grid.line'].flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            SELECT DISTINCT ON (pt.id) pt.id, pt.pricing_type, r.amount
+              FROM product_template pt
+              JOIN product_pricing_rule r ON r.product_tmpl_id = pt.id
+               AND r.family = pt.pricing_type AND r.rule_kind = 'qty'
+             WHERE pt.id = ANY(%s)
+          ORDER BY pt.id, COALESCE(r.min_qty, 0), r.id
+        """, [templates.ids])
+        result = {template_id: (family, amount) for template_id, family, amount in cr.fetchall()}
+        cr.execute("""
+            SELECT DISTINCT ON (pt.id) pt.id, pt.pricing_type, pt.landing_price, pt.mrp_price, l.margin_per
+              FROM product_template pt
+              JOIN product_price_grid g ON g.id = pt.price_grid_id AND g.family = pt.pricing_type AND g.active
+              JOIN product_price_grid_line l ON l.grid_id = g.id AND l.rule_kind = 'qty'
+             WHERE pt.id = ANY(%s)
+          ORDER BY pt.id, COALESCE(l.min_qty, 0), l.id
+        """, [[template_id for template_id in templates.ids if template_id not in result]])
+        for template_id, family, landing_price, mrp_price, margin_per in cr.fetchall():
+            result[template_id] = (family, rule_price(family, landing_price, mrp_price, margin_per))
+        return result
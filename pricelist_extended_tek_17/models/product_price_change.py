@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+from .product_pricing_rule import CHANGE_KEY_FIELDS, PRICING_FAMILIES
+
+CHANGE_RETENTION_DAYS = 90
+CHANGE_FIELDS = ['create_date', 'rule_id', 'product_id', 'product_tmpl_id', 'family', 'rule_kind',
+                 'min_qty', 'max_qty', 'customer_type_id', 'change_type', 'old_amount', 'new_amount']
+
+
+class ProductPriceChange(models.Model):
+    """Append-only log of the effective price changes of the pricing rules.
+
+    Changes are collected during the transaction per (product, family, rule
+    key), so that a rule deleted and recreated by the variant sync with the
+    same price leaves no trace, and inserted in one query at commit.
+    Consumers poll ``get_changes`` with the position of the last change
+    they have processed. A rule whose key changes logs the removal of the price at its old key
+    and a new price at its new key.
+    """
+    _name = 'product.price.change'
+    _description = "Product Price Change"
+    _order = 'id'
+    _log_access = False
+
+    create_date = fields.Datetime("Date", readonly=True, index=True)
+    rule_id = fields.Many2one('product.pricing.rule', string="Pricing Rule", readonly=True, ondelete='set null')
+    product_id = fields.Many2one('product.product', string="Product Variant", readonly=True, index='btree_not_null')
+    product_tmpl_id = fields.Many2one('product.template', string="Product Template", readonly=True,
+                                      index='btree_not_null')
+    family = fields.Selection(PRICING_FAMILIES, string="Pricing Type", readonly=True, index=True)
+    rule_kind = fields.Selection([
+        ('qty', 'Quantity'),
+        ('customer', 'Customer Type'),
+    ], string="Rule Kind", readonly=True)
+    min_qty = fields.Float("Min Qty", readonly=True)
+    max_qty = fields.Float("Max Qty", readonly=True)
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type", readonly=True)
+    change_type = fields.Selection([
+        ('create', 'New Price'),
+        ('update', 'Price Change'),
+        ('delete', 'Price Removed'),
+    ], string="Change", readonly=True)
+    old_amount = fields.Float("Old Price", readonly=True)
+    new_amount = fields.Float("New Price", readonly=True)
+
+    def init(self):
+        # transaction ids are 64 bits, wider than integer fields
+        self.env.cr.execute("ALTER TABLE product_price_change ADD COLUMN IF NOT EXISTS xact_id bigint")
+        # changes logged before the column existed come first
+        self.env.cr.execute("UPDATE product_price_change SET xact_id = 0 WHERE xact_id IS NULL")
+        tools.create_index(self.env.cr, 'product_price_change_xact_id_index', self._table, ['xact_id', 'id'])
+
+    @api.model
+    def _record_changes(self, rules, old_amounts=None, new_amounts=None):
+        """Collect the price changes of ``rules`` until commit.
+
+        ``old_amounts`` and ``new_amounts`` map rule ids to their amount, a
+        missing mapping meaning the rule did not exist before or after.
+        """
+        for rule in rules:
+            key = tuple(rule[fname].id or None if fname.endswith('_id') else rule[fname] for fname in CHANGE_KEY_FIELDS)
+            self._record_change(
+                key, rule.id,
+                old_amounts.get(rule.id) if old_amounts is not None else None,
+                new_amounts.get(rule.id) if new_amounts is not None else None,
+            )
+
+    @api.model
+    def _record_change(self, key, rule_id, old_amount, new_amount):
+        """Collect the price change of one rule key until commit"""
+        cr = self.env.cr
+        changes = cr.precommit.data.get('product.price.changes')
+        if changes is None:
+            changes = cr.precommit.data['product.price.changes'] = {}
+            cr.precommit.add(self._flush_changes)
+        if key in changes:
+            # keep the amount before the first change of the transaction
+            changes[key][1:] = [new_amount, rule_id]
+        else:
+            changes[key] = [old_amount, new_amount, rule_id]
+
+    def _flush_changes(self):
+        changes = self.env.cr.precommit.data.pop('product.price.changes', {})
+        rows = []
+        for key, (old_amount, new_amount, rule_id) in changes.items():
+            if old_amount == new_amount:
+                continue
+            if old_amount is None:
+                change_type = 'create'
+            elif new_amount is None:
+                change_type = 'delete'
+            else:
+                change_type = 'update'
+            rows.append((
+                rule_id if new_amount is not None else None, *key,
+                change_type, old_amount or 0.0, new_amount or 0.0,
+            ))
+        if not rows:
+            return
+        # stamped with the id of the transaction, which orders the changes
+        # for the consumers: see get_changes
+        query = """
+            INSERT INTO product_price_change (rule_id, {}, change_type, old_amount, new_amount, create_date, xact_id)
+            VALUES {}
+        """.format(
+            ", ".join(CHANGE_KEY_FIELDS),
+            ", ".join(["({}, now() at time zone 'UTC', txid_current())".format(", ".join(["%s"] * len(rows[0])))]
+                      * len(rows)),
+        )
+        self.env.cr.execute(query, [value for row in rows for value in row])
+
+    @api.model
+    def get_changes(self, after_xact_id=0, after_id=0, limit=1000):
+        """Return the price changes logged after the change at position
+        (``after_xact_id``, ``after_id``), in log order, with their
+        ``xact_id``. Consumers store the ``xact_id`` and ``id`` of the last
+        change they processed and pass them to the next call.
+
+        Ids are assigned before the logging transactions commit, so a change
+        with a lower id may become visible after a higher one. Changes are
+        ordered by the id of their transaction instead, and only the ones of
+        the transactions older than the oldest transaction still running are
+        returned: no change can be committed before them anymore. Changes are
+        kept ``CHANGE_RETENTION_DAYS`` days, a consumer that falls further
+        behind must resynchronise all prices."""
+        self.env.cr.execute("""
+            SELECT id, xact_id
+              FROM product_price_change
+             WHERE (xact_id, id) > (%s, %s)
+               AND xact_id < txid_snapshot_xmin(txid_current_snapshot())
+          ORDER BY xact_id, id
+             LIMIT %s
+        """, [after_xact_id, after_id, limit])
+        xact_ids = dict(self.env.cr.fetchall())
+        changes = self.browse(xact_ids).read(CHANGE_FIELDS, load=None)
+        for change in changes:
+            change['xact_id'] = xact_ids[change['id']]
+        return changes
+
+    @api.autovacuum
+    def _gc_changes(self):
+        """Remove the changes older than the retention period"""
+        limit_date = fields.Datetime.now() - timedelta(days=CHANGE_RETENTION_DAYS)
+        self.search([('create_date', '<', limit_date)]).unlink()
@@ -0,0 +1,157 @@
+from collections import defaultdict
+
+from odoo import models, fields, api
+
+from ..lib.pricing_core import resolve_customer_type, rule_price
+from .product_pricing_rule import PRICING_FAMILIES, TIER_RANGE
+
+
+class ProductPriceGrid(models.Model):
+    """Named set of quantity tiers and customer type margins shared by many
+    products of a pricing family.
+
+    Prices are computed from the product's base price when they are looked
+    up, so a product using a grid owns no pricing rule rows. A product with
+    its own rules of a kind (quantity or customer type) uses them instead of
+    the grid rules of that kind. Archived grids give no price.
+    """
+    _name = 'product.price.grid'
+    _description = "Price Grid"
+    _order = 'name'
+
+    name = fields.Char("Name", required=True)
+    active = fields.Boolean(default=True)
+    family = fields.Selection(PRICING_FAMILIES, string="Pricing Type", required=True, default='regular')
+    line_ids = fields.One2many('product.price.grid.line', 'grid_id', string="Grid Rules", copy=True)
+    qty_line_ids = fields.One2many(
+        'product.price.grid.line', 'grid_id', string="Quantity Tiers",
+        domain=[('rule_kind', '=', 'qty')], context={'default_rule_kind': 'qty'},
+    )
+    customer_line_ids = fields.One2many(
+        'product.price.grid.line', 'grid_id', string="Customer Type Margins",
+        domain=[('rule_kind', '=', 'customer')], context={'default_rule_kind': 'customer'},
+    )
+    product_tmpl_ids = fields.One2many('product.template', 'price_grid_id', string="Products")
+    product_count = fields.Integer("Products", compute="_compute_product_count")
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'family' in vals or 'active' in vals:
+            self.env['product.customer.price']._mark_templates(
+                self.with_context(active_test=False).product_tmpl_ids)
+            self.env['pricing.cache']._invalidate()
+        return res
+
+    def unlink(self):
+        # the lines cascade and the products lose their grid in the database
+        self.env['product.customer.price']._mark_templates(self.with_context(active_test=False).product_tmpl_ids)
+        self.env['pricing.cache']._invalidate()
+        return super().unlink()
+
+    def _compute_product_count(self):
+        counts = dict(self.env['product.template']._read_group(
+            [('price_grid_id', 'in', self.ids)], ['price_grid_id'], ['__count']))
+        for grid in self:
+            grid.product_count = counts.get(grid, 0)
+
+    @api.model
+    def _find_amounts(self, rule_kind, keys):
+        """Return the grid price of each (template id, family, quantity or
+        customer type id) key of the templates without own rules of
+        ``rule_kind``, with one query for all keys."""
+        keys = [key for key in keys if key[2]]
+        if not keys:
+            return {}
+        chains = {}
+        if rule_kind == 'customer':
+            # customer type keys fall back to the margins of the ancestor types
+            CustomerType = self.env['res.partner.customer.type']
+            chains = {key: CustomerType._get_ancestor_ids(key[2]) for key in keys}
+            keys = list({(key[0], key[1], type_id) for key, chain in chains.items() for type_id in chain})
+        self.env['product.template'].flush_model(['price_grid_id', 'landing_price', 'mrp_price'])
+        self.flush_model(['family', 'active'])
+        self.env['product.price.grid.line'].flush_model()
+        self.env['product.pricing.rule'].flush_model(['product_tmpl_id', 'family', 'rule_kind'])
+        if rule_kind == 'qty':
+            match, order, value_type = TIER_RANGE.format(alias='l.') + " @> q.value", "l.min_qty", "numeric"
+        else:
+            match, order, value_type = "l.customer_type_id = q.value", "l.id", "int"
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (q.owner_id, q.family, q.value)
+                   q.owner_id, q.family, q.value, pt.landing_price, pt.mrp_price, l.margin_per
+              FROM unnest(%s::int[], %s::varchar[], %s::{value_type}[]) AS q(owner_id, family, value)
+              JOIN product_template pt ON pt.id = q.owner_id
+              JOIN product_price_grid g ON g.id = pt.price_grid_id AND g.family = q.family AND g.active
+              JOIN product_price_grid_line l ON l.grid_id = g.id AND l.rule_kind = %s AND {match}
+             WHERE NOT EXISTS (
+                   SELECT 1 FROM product_pricing_rule r
+                    WHERE r.product_tmpl_id = q.owner_id AND r.family = q.family AND r.rule_kind = %s)
+          ORDER BY q.owner_id, q.family, q.value, {order}
+        """.format(value_type=value_type, match=match, order=order),
+            [*map(list, zip(*keys)), rule_kind, rule_kind])
+        result = {}
+        for owner_id, family, value, landing_price, mrp_price, margin_per in self.env.cr.fetchall():
+            key = (owner_id, family, float(value) if rule_kind == 'qty' else value)
+            result[key] = rule_price(family, landing_price, mrp_price, margin_per)
+        if rule_kind == 'customer':
+            by_owner = defaultdict(dict)
+            for (owner_id, family, type_id), amount in result.items():
+                by_owner[owner_id, family][type_id] = amount
+            result = {}
+            for key, chain in chains.items():
+                type_id = resolve_customer_type(by_owner[key[:2]], chain)
+                if type_id:
+                    result[key] = by_owner[key[:2]][type_id]
+        return result
+
+
+class ProductPriceGridLine(models.Model):
+    _name = 'product.price.grid.line'
+    _description = "Price Grid Rule"
+    _order = 'grid_id, rule_kind, min_qty, id'
+
+    _sql_constraints = [
+        ('grid_customer_type_uniq', 'unique(grid_id, customer_type_id)',
+         "A grid can only have one margin per customer type."),
+        ('tier_range_check', 'CHECK(max_qty = 0 OR max_qty >= min_qty)',
+         "The maximum quantity of a tier must be greater than its minimum quantity."),
+        ('grid_tier_overlap_excl',
+         "EXCLUDE USING gist (grid_id WITH =, %s WITH &&) WHERE (rule_kind = 'qty')" % TIER_RANGE.format(alias=''),
+         "The quantity tiers of a grid cannot overlap."),
+    ]
+
+    grid_id = fields.Many2one('product.price.grid', string="Grid", required=True, ondelete='cascade', index=True)
+    family = fields.Selection(related='grid_id.family')
+    rule_kind = fields.Selection([
+        ('qty', 'Quantity'),
+        ('customer', 'Customer Type'),
+    ], string="Rule Kind", required=True, default='qty')
+    min_qty = fields.Float("Min Qty")
+    max_qty = fields.Float("Max Qty")
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type")
+    margin_per = fields.Float("Margin (%)", help="Margin on the landing price, or discount on the MRP price for LP grids")
+
+    def load(self, fields, data):
+        result = super().load(fields, data)
+        if result.get('ids'):
+            self.env['pricing.cache']._invalidate(warm_up=True)
+        return result
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['product.customer.price']._mark_templates(lines.grid_id.product_tmpl_ids)
+        self.env['pricing.cache']._invalidate()
+        return lines
+
+    def write(self, vals):
+        grids = self.grid_id
+        res = super().write(vals)
+        self.env['product.customer.price']._mark_templates((grids | self.grid_id).product_tmpl_ids)
+        self.env['pricing.cache']._invalidate()
+        return res
+
+    def unlink(self):
+        self.env['product.customer.price']._mark_templates(self.grid_id.product_tmpl_ids)
+        self.env['pricing.cache']._invalidate()
+        return super().unlink()
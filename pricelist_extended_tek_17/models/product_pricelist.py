@@ -0,0 +1,120 @@
+from odoo import models, fields, api, _
+
+
+class ProductPricelist(models.Model):
+    _inherit = 'product.pricelist'
+
+    def _compute_price_rule(self, products, quantity, currency=None, uom=None, date=False, compute_price=True, **kwargs):
+        """Resolve the extended pricing items of all the products at once.
+
+        The items are first priced from their base price without looking up
+        the pricing rules, then the products having an applicable rule get the
+        rule price, with one query per rule kind for all of them.
+        """
+        results = super(ProductPricelist, self.with_context(extended_pricing_batch=True))._compute_price_rule(
+            products, quantity, currency=currency, uom=uom, date=date, compute_price=compute_price, **kwargs)
+        if not compute_price or not results:
+            return results
+
+        items = self.env['product.pricelist.item'].browse(
+            {item_id for _price, item_id in results.values() if item_id})
+        extended_items = items.filtered(lambda item: item.compute_price == 'extended')
+        if not extended_items:
+            return results
+        extended_products = products.filtered(
+            lambda product: results[product.id][1] and results[product.id][1] in extended_items.ids)
+        amounts = extended_items._get_extended_amounts(extended_products, quantity, uom)
+        for product in extended_products:
+            if product.id in amounts:
+                item = extended_items.browse(results[product.id][1])
+                price = item._convert_extended_price(product, amounts[product.id], uom, date, currency)
+                results[product.id] = (price, item.id)
+        return results
+
+
+class ProductPricelistItem(models.Model):
+    _inherit = 'product.pricelist.item'
+
+    compute_price = fields.Selection(
+        selection_add=[('extended', 'Extended Pricing Rules')],
+        ondelete={'extended': 'set default'},
+    )
+
+    @api.depends('applied_on', 'categ_id', 'product_tmpl_id', 'product_id', 'compute_price', 'fixed_price',
+                 'pricelist_id', 'percent_price', 'price_discount', 'price_surcharge')
+    def _compute_name_and_price(self):
+        super()._compute_name_and_price()
+        for item in self.filtered(lambda i: i.compute_price == 'extended'):
+            item.price = _("Quantity / customer type pricing rules")
+
+    def _compute_price(self, product, quantity, uom, date, currency=None):
+        """Price from the pricing rules of the product, or from the base price
+        of the item when no rule applies."""
+        price = super()._compute_price(product, quantity, uom, date, currency=currency)
+        # batched by product.pricelist._compute_price_rule
+        if self.compute_price != 'extended' or self.env.context.get('extended_pricing_batch'):
+            return price
+        amounts = self._get_extended_amounts(product, quantity, uom)
+        if product.id in amounts:
+            price = self._convert_extended_price(product, amounts[product.id], uom, date, currency)
+        return price
+
+    @api.model
+    def _get_extended_amounts(self, products, quantity, uom=None):
+        """Return the rule price of each product having an applicable rule.
+
+        The pricing type and customer type are the ones of the context (set by
+        the sale order lines), else of the partner in context, else of the
+        current user's partner. Variants are priced from their own rules,
+        else from the rules of their template, else from its grid.
+        """
+        context = products.env.context
+        partner = self.env['res.partner'].browse(context.get('pricing_partner_id')) or self.env.user.partner_id
+        pricing_type = context.get('extended_pricing_type') or partner.pricing_type
+        customer_type_id = context.get('extended_customer_type_id') or partner.customer_type_id.id
+
+        keys = {}
+        variant_keys = {}
+        for product in products:
+            is_variant = product._name == 'product.product'
+            template = product.product_tmpl_id if is_variant else product
+            if pricing_type == 'fixed':
+                value = customer_type_id
+            elif pricing_type == 'quantity':
+                value = quantity
+                if uom and uom != product.uom_id:
+                    value = uom._compute_quantity(quantity, product.uom_id, raise_if_failure=False)
+                value = value or 1.0
+            else:
+                continue
+            keys[product.id] = (template.id, template.pricing_type, value)
+            if is_variant:
+                variant_keys[product.id] = (product.id, product.pricing_type, value)
+
+        Rule = self.env['product.pricing.rule']
+        rule_kind = 'customer' if pricing_type == 'fixed' else 'qty'
+        find_rules = Rule._find_customer_rules if rule_kind == 'customer' else Rule._find_tiers
+        # variant rules first, then the template rules for the other products
+        variant_rules = find_rules('product_id', set(variant_keys.values()))
+        result = {
+            product_id: variant_rules[key].amount
+            for product_id, key in variant_keys.items()
+            if key in variant_rules
+        }
+        keys = {product_id: key for product_id, key in keys.items() if product_id not in result}
+        rules = find_rules('product_tmpl_id', set(keys.values()))
+        amounts = {key: rule.amount for key, rule in rules.items()}
+        # products without own rules of the kind are priced from their grid
+        amounts.update(self.env['product.price.grid']._find_amounts(
+            rule_kind, {key for key in keys.values() if key not in rules}))
+        result.update({product_id: amounts.get(key) for product_id, key in keys.items()})
+        return {product_id: amount for product_id, amount in result.items() if amount}
+
+    def _convert_extended_price(self, product, amount, uom, date, currency=None):
+        """Convert a rule price, in the product unit and company currency"""
+        currency = currency or self.currency_id or self.env.company.currency_id
+        if uom and uom != product.uom_id:
+            amount = product.uom_id._compute_price(amount, uom)
+        if product.currency_id != currency:
+            amount = product.currency_id._convert(amount, currency, self.env.company, date or fields.Date.today())
+        return amount
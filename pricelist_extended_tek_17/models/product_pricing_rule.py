@@ -0,0 +1,356 @@
+import logging
+from collections import defaultdict
+
+import psycopg2
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+from ..lib.pricing_core import find_overlap, resolve_customer_type, rule_margin, rule_price
+
+_logger = logging.getLogger(__name__)
+
+PRICING_FAMILIES = [
+    ('regular', 'Regular'),
+    ('lp_based', 'LP Based(Manufacture))'),
+    ('lp_based_purchase', 'LP Based(Purchase)'),
+]
+
+# Tier bounds are inclusive and 0 means unbounded, as in the sale order line
+# lookup: numrange() treats NULL bounds as infinite.
+TIER_RANGE = "numrange(NULLIF({alias}min_qty, 0)::numeric, NULLIF({alias}max_qty, 0)::numeric, '[]')"
+
+# rule fields the stored customer type and first tier prices depend on
+CUSTOMER_PRICE_FIELDS = {'product_tmpl_id', 'family', 'rule_kind', 'min_qty', 'max_qty', 'customer_type_id', 'amount'}
+
+# rule fields the cached pricing tables are built from
+PRICING_TABLE_FIELDS = {'product_id', 'product_tmpl_id', 'family', 'rule_kind', 'price_base', 'min_qty', 'max_qty',
+                        'customer_type_id', 'margin_per', 'amount'}
+
+# rule fields identifying the price logged in the price change log
+CHANGE_KEY_FIELDS = ['product_id', 'product_tmpl_id', 'family', 'rule_kind', 'min_qty', 'max_qty', 'customer_type_id']
+
+
+class ProductPricingRule(models.Model):
+    """Quantity tier or customer type rule of a product pricing family.
+
+    Regular rules add a margin to the landing price, LP (manufacture and
+    purchase) rules take a discount from the MRP price. Template rules are
+    copied to the variants by ``product.template._sync_pricing_to_variants``.
+    """
+    _name = 'product.pricing.rule'
+    _description = "Product Pricing Rule"
+    _order = 'family, rule_kind, min_qty, id'
+
+    _sql_constraints = [
+        ('product_customer_type_uniq', 'unique(product_id, family, customer_type_id)',
+         "A variant can only have one price per customer type."),
+        ('product_tmpl_customer_type_uniq', 'unique(product_tmpl_id, family, customer_type_id)',
+         "A product can only have one price per customer type."),
+        ('tier_range_check', 'CHECK(max_qty = 0 OR max_qty >= min_qty)',
+         "The maximum quantity of a tier must be greater than its minimum quantity."),
+        ('product_tier_overlap_excl',
+         "EXCLUDE USING gist (product_id WITH =, family WITH =, %s WITH &&) WHERE (rule_kind = 'qty')"
+         % TIER_RANGE.format(alias=''),
+         "The quantity tiers of a variant cannot overlap."),
+        ('product_tmpl_tier_overlap_excl',
+         "EXCLUDE USING gist (product_tmpl_id WITH =, family WITH =, %s WITH &&) WHERE (rule_kind = 'qty')"
+         % TIER_RANGE.format(alias=''),
+         "The quantity tiers of a product cannot overlap."),
+    ]
+
+    is_pricelist_user = fields.Boolean(
+        string="Is Pricelist User",
+        compute="_compute_is_pricelist_user",
+        store=False
+    )
+
+    def _compute_is_pricelist_user(self):
+        for user in self:
+            user.is_pricelist_user = self.env.user.has_group("pricelist_extended_tek_17.group_pricelist_user")
+
+    product_id = fields.Many2one('product.product', string="Product Variant", index='btree_not_null')
+    product_tmpl_id = fields.Many2one('product.template', string="Product Template", index='btree_not_null')
+
+    family = fields.Selection(PRICING_FAMILIES, string="Pricing Type", required=True, default='regular')
+    rule_kind = fields.Selection([
+        ('qty', 'Quantity'),
+        ('customer', 'Customer Type'),
+    ], string="Rule Kind", required=True, default='qty')
+    price_base = fields.Selection([
+        ('landing', 'Landing Price'),
+        ('mrp', 'MRP Price'),
+    ], string="Price Base", compute="_compute_price_base", store=True)
+
+    min_qty = fields.Float("Min Qty")
+    max_qty = fields.Float("Max Qty")
+    customer_type_id = fields.Many2one(
+        'res.partner.customer.type',
+        string="Customer Type",
+        index=True,
+    )
+
+    margin_per = fields.Float("Margin (%)", help="Margin on the landing price, or discount on the MRP price for LP rules")
+    amount = fields.Float("Sale Price", compute="_compute_amount", store=True)
+    margin = fields.Float("Margin (₹)", compute="_compute_margin", store=True)
+
+    def _auto_init(self):
+        # the exclusion constraints need gist support for the product ids
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except psycopg2.Error:
+            _logger.warning(
+                "Could not create the btree_gist extension, tier overlaps of %s are only checked in Python.",
+                self._name,
+            )
+        return super()._auto_init()
+
+    @api.depends('family')
+    def _compute_price_base(self):
+        for rec in self:
+            rec.price_base = 'landing' if rec.family == 'regular' else 'mrp'
+
+    @api.depends('family', 'margin_per',
+                 'product_id.landing_price', 'product_tmpl_id.landing_price',
+                 'product_id.mrp_price', 'product_tmpl_id.mrp_price')
+    def _compute_amount(self):
+        for rec in self:
+            rec.amount = rule_price(
+                rec.family,
+                rec.product_id.landing_price or rec.product_tmpl_id.landing_price,
+                rec.product_id.mrp_price or rec.product_tmpl_id.mrp_price,
+                rec.margin_per,
+            )
+
+    @api.depends('amount', 'family',
+                 'product_id.landing_price', 'product_tmpl_id.landing_price',
+                 'product_id.pricing_cost', 'product_tmpl_id.pricing_cost')
+    def _compute_margin(self):
+        for rec in self:
+            # LP (manufacture) margins are measured against the product cost
+            # snapshot, not standard_price which changes on every AVCO receipt
+            rec.margin = rule_margin(
+                rec.family,
+                rec.amount,
+                rec.product_id.landing_price or rec.product_tmpl_id.landing_price,
+                rec.product_id.pricing_cost or rec.product_tmpl_id.pricing_cost,
+            )
+
+    @api.constrains('min_qty', 'max_qty', 'product_id', 'product_tmpl_id', 'family', 'rule_kind')
+    def _check_tier_overlap(self):
+        """Check that the tiers of the modified products don't overlap, with
+        one search per owner field and a sorted sweep over each product."""
+        tiers = self.filtered(lambda r: r.rule_kind == 'qty')
+        for owner_field in ('product_id', 'product_tmpl_id'):
+            owners = tiers[owner_field]
+            if not owners:
+                continue
+            intervals = defaultdict(list)
+            for tier in self.search([(owner_field, 'in', owners.ids), ('rule_kind', '=', 'qty')]):
+                lower = tier.min_qty or float('-inf')
+                upper = tier.max_qty or float('inf')
+                if lower > upper:
+                    raise ValidationError(_(
+                        "The maximum quantity of a tier must be greater than its minimum quantity."))
+                intervals[tier[owner_field], tier.family].append((lower, upper))
+            for (owner, _family), owner_intervals in intervals.items():
+                overlap = find_overlap(owner_intervals)
+                if overlap:
+                    raise ValidationError(_(
+                        "The quantity tiers of %(product)s overlap: %(tier)s and %(next_tier)s.",
+                        product=owner.display_name,
+                        tier=self._format_tier(*overlap[0]),
+                        next_tier=self._format_tier(*overlap[1]),
+                    ))
+
+    @api.model
+    def _format_tier(self, lower, upper):
+        return "[%s - %s]" % (
+            lower if lower != float('-inf') else "",
+            upper if upper != float('inf') else "",
+        )
+
+    def write(self, vals):
+        """Trigger sync to variants when template pricing rules are modified"""
+        result = super().write(vals)
+        self._propagate_rule_changes(self.product_tmpl_id, self.product_id)
+        return result
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self.env['product.price.change']._record_changes(rules, new_amounts={rule.id: rule.amount for rule in rules})
+        self._propagate_rule_changes(rules.product_tmpl_id, rules.product_id)
+        self.env['product.customer.price']._mark_templates(rules.product_tmpl_id)
+        self.env['pricing.cache']._invalidate()
+        return rules
+
+    def load(self, fields, data):
+        result = super().load(fields, data)
+        if result.get('ids'):
+            self.env['pricing.cache']._invalidate(warm_up=True)
+        return result
+
+    def _write(self, vals):
+        # stored amounts are written here when flushed, including the ones
+        # recomputed from a cost or landing price change
+        if ('amount' in vals or set(CHANGE_KEY_FIELDS).intersection(vals)) and self.ids:
+            self._record_price_changes(vals)
+        if CUSTOMER_PRICE_FIELDS.intersection(vals):
+            templates = self.product_tmpl_id | self.product_tmpl_id.browse(vals.get('product_tmpl_id'))
+            self.env['product.customer.price']._mark_templates(templates)
+        if PRICING_TABLE_FIELDS.intersection(vals):
+            self.env['pricing.cache']._invalidate()
+        return super()._write(vals)
+
+    def _record_price_changes(self, vals):
+        """Log the price changes of a flushed write: a changed amount, or the
+        removal of the price at the old key and its addition at the new one
+        when the rule key changes."""
+        PriceChange = self.env['product.price.change']
+        self.env.cr.execute(
+            "SELECT id, amount, {} FROM product_pricing_rule WHERE id = ANY(%s)".format(", ".join(CHANGE_KEY_FIELDS)),
+            [self.ids],
+        )
+        for rule_id, old_amount, *old_key in self.env.cr.fetchall():
+            rule = self.browse(rule_id)
+            new_amount = vals.get('amount', old_amount)
+            # NULL quantities of migrated rules read as 0
+            old_key = tuple(
+                value if value is not None or fname.endswith('_id') else 0.0
+                for fname, value in zip(CHANGE_KEY_FIELDS, old_key)
+            )
+            new_key = tuple(
+                rule[fname].id or None if fname.endswith('_id') else rule[fname] for fname in CHANGE_KEY_FIELDS)
+            if old_key == new_key:
+                PriceChange._record_change(new_key, rule_id, old_amount, new_amount)
+            else:
+                PriceChange._record_change(old_key, rule_id, old_amount, None)
+                PriceChange._record_change(new_key, rule_id, None, new_amount)
+
+    def unlink(self):
+        self.env['product.price.change']._record_changes(self, {rule.id: rule.amount for rule in self})
+        self.env['product.customer.price']._mark_templates(self.product_tmpl_id)
+        self.env['pricing.cache']._invalidate()
+        templates, variants = self.product_tmpl_id, self.product_id
+        result = super().unlink()
+        self._propagate_rule_changes(templates, variants)
+        return result
+
+    @api.model
+    def _propagate_rule_changes(self, templates, variants):
+        """Copy the rules of the modified templates to their synced variants,
+        and stop syncing the variants whose own rules were modified. Rules
+        are edited from their own lists, not through the product forms."""
+        if self.env.context.get('sync_from_template'):
+            return
+        variants.filtered(lambda v: not v.has_custom_pricing).write({'has_custom_pricing': True})
+        for template in templates.filtered('auto_sync_to_variants'):
+            variants_to_sync = template.product_variant_ids.filtered(lambda v: not v.has_custom_pricing)
+            if variants_to_sync:
+                template._sync_pricing_rules_to_variants(variants_to_sync)
+
+    @api.model
+    def _get_rules_action(self, owner_field, owner, rule_kind):
+        """Paginated list of the rules of ``rule_kind`` of the current pricing
+        family of ``owner``, editable unless the user is a pricelist user."""
+        readonly = self.env.user.has_group('pricelist_extended_tek_17.group_pricelist_user')
+        family = owner.pricing_type or 'regular'
+        if rule_kind == 'qty':
+            name = _("Quantity Pricing")
+            view = self.env.ref('pricelist_extended_tek_17.view_product_pricing_rule_qty_tree')
+        else:
+            name = _("Customer Type Pricing")
+            view = self.env.ref('pricelist_extended_tek_17.view_product_pricing_rule_customer_tree')
+        return {
+            'type': 'ir.actions.act_window',
+            'name': "%s - %s" % (name, owner.display_name),
+            'res_model': 'product.pricing.rule',
+            'view_mode': 'tree',
+            'views': [(view.id, 'tree')],
+            'domain': [(owner_field, '=', owner.id), ('family', '=', family), ('rule_kind', '=', rule_kind)],
+            'context': {
+                'default_%s' % owner_field: owner.id,
+                'default_family': family,
+                'default_rule_kind': rule_kind,
+                'create': not readonly,
+                'edit': not readonly,
+                'delete': not readonly,
+            },
+        }
+
+    def _prepare_variant_vals(self, variant):
+        """Values of the copy of this template rule on ``variant``"""
+        return {
+            'product_id': variant.id,
+            'product_tmpl_id': False,  # Clear template reference
+            'family': self.family,
+            'rule_kind': self.rule_kind,
+            'min_qty': self.min_qty,
+            'max_qty': self.max_qty,
+            'customer_type_id': self.customer_type_id.id,
+            'margin_per': self.margin_per,
+        }
+
+    @api.model
+    def _find_tiers(self, owner_field, keys):
+        """Return the quantity tier applicable to each (owner id, family,
+        quantity) key.
+
+        All keys are resolved with one range query served by the gist index
+        of the exclusion constraint. Keys without a tier are left out of the
+        returned dict.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        self.flush_model(['product_id', 'product_tmpl_id', 'family', 'rule_kind', 'min_qty', 'max_qty'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (q.owner_id, q.family, q.qty) q.owner_id, q.family, q.qty, t.id
+              FROM unnest(%s::int[], %s::varchar[], %s::numeric[]) AS q(owner_id, family, qty)
+              JOIN product_pricing_rule t ON t.{owner} = q.owner_id
+               AND t.family = q.family
+               AND t.rule_kind = 'qty'
+               AND {tier_range} @> q.qty
+          ORDER BY q.owner_id, q.family, q.qty, t.min_qty
+        """.format(owner=owner_field, tier_range=TIER_RANGE.format(alias='t.')), list(map(list, zip(*keys))))
+        rows = self.env.cr.fetchall()
+        rule_ids = [rule_id for *_key, rule_id in rows]
+        return {
+            (owner_id, family, float(qty)): self.browse(rule_id).with_prefetch(rule_ids)
+            for owner_id, family, qty, rule_id in rows
+        }
+
+    @api.model
+    def _find_customer_rules(self, owner_field, keys):
+        """Return the customer type rule of each (owner id, family, customer
+        type id) key, with one query for all keys. A key without rule for its
+        customer type gets the rule of the nearest ancestor type."""
+        CustomerType = self.env['res.partner.customer.type']
+        chains = {key: CustomerType._get_ancestor_ids(key[2]) for key in keys if key[2]}
+        if not chains:
+            return {}
+        lookup_keys = {(key[0], key[1], type_id) for key, chain in chains.items() for type_id in chain}
+        self.flush_model(['product_id', 'product_tmpl_id', 'family', 'rule_kind', 'customer_type_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (q.owner_id, q.family, q.customer_type_id)
+                   q.owner_id, q.family, q.customer_type_id, t.id
+              FROM unnest(%s::int[], %s::varchar[], %s::int[]) AS q(owner_id, family, customer_type_id)
+              JOIN product_pricing_rule t ON t.{owner} = q.owner_id
+               AND t.family = q.family
+               AND t.rule_kind = 'customer'
+               AND t.customer_type_id = q.customer_type_id
+          ORDER BY q.owner_id, q.family, q.customer_type_id, t.id
+        """.format(owner=owner_field), list(map(list, zip(*lookup_keys))))
+        rows = self.env.cr.fetchall()
+        rule_ids = [rule_id for *_key, rule_id in rows]
+        found = defaultdict(dict)
+        for owner_id, family, customer_type_id, rule_id in rows:
+            found[owner_id, family][customer_type_id] = self.browse(rule_id).with_prefetch(rule_ids)
+        result = {}
+        for key, chain in chains.items():
+            type_id = resolve_customer_type(found[key[:2]], chain)
+            if type_id:
+                result[key] = found[key[:2]][type_id]
+        return result
@@ -1,4 +1,7 @@
-from odoo import models, fields, api
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -22,3 +25,44 @@ class ResPartner(models.Model):
         for rec in self:
             if rec.pricing_type == 'fixed' and not rec.customer_type_id:
                 raise ValidationError(_("Customer Type is required when Pricing Type is Fixed."))
+
+    def write(self, vals):
+        if 'pricing_type' not in vals and 'customer_type_id' not in vals:
+            return super().write(vals)
+        old_classification = {partner: (partner.pricing_type, partner.customer_type_id) for partner in self}
+        res = super().write(vals)
+        reclassified = self.filtered(
+            lambda partner: (partner.pricing_type, partner.customer_type_id) != old_classification[partner])
+        if reclassified:
+            reclassified._reprice_draft_orders()
+        return res
+
+    def _reprice_draft_orders(self):
+        """Align the quotations of the partners and of their child contacts
+        with the partners' pricing type and customer type, and reprice all
+        their lines in one batched pass. Prices typed by hand are kept."""
+        # partners can be reclassified by users without access to quotations
+        orders = self.env['sale.order'].sudo().search([
+            ('partner_id', 'child_of', self.ids),
+            ('state', 'in', ('draft', 'sent')),
+        ])
+        if not orders:
+            return
+
+        # orders of a child contact follow the closest reclassified ancestor
+        orders_by_classification = defaultdict(lambda: self.env['sale.order'].sudo())
+        for order in orders:
+            partner = order.partner_id
+            while partner not in self:
+                partner = partner.parent_id
+            orders_by_classification[partner.pricing_type, partner.customer_type_id.id] |= order
+
+        with self.env['pricing.stage.sample']._profile('partner_repricing') as sample:
+            for (pricing_type, customer_type_id), classified_orders in orders_by_classification.items():
+                classified_orders.write({
+                    'pricing_type': pricing_type or 'quantity',
+                    'customer_type_id': customer_type_id,
+                })
+            lines = orders.order_line.filtered(lambda line: not line._has_manual_price())
+            sample['records'] = len(lines)
+            lines._apply_extended_pricing()
@@ -1,7 +1,71 @@
-from odoo import models, fields
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+from ..lib.pricing_core import resolve_customer_type
+
 
 class ResPartnerCustomerType(models.Model):
     _name = 'res.partner.customer.type'
     _description = "Customer Type"
+    _parent_store = True
 
     name = fields.Char("Customer Type", required=True)
+    parent_id = fields.Many2one(
+        'res.partner.customer.type',
+        string="Parent Type",
+        index=True,
+        ondelete='restrict',
+        help="Customer type whose prices apply when a product has no price for this type",
+    )
+    child_ids = fields.One2many('res.partner.customer.type', 'parent_id', string="Child Types")
+    parent_path = fields.Char(index=True, unaccent=False)
+    min_margin_per = fields.Float(
+        "Minimum Margin (%)",
+        help="Minimum margin on the landing price of the lines of confirmed orders, when the margin floor check "
+             "is enabled. Types without minimum margin use the one of their nearest parent type.",
+    )
+
+    @api.constrains('parent_id')
+    def _check_parent_id(self):
+        if not self._check_recursion():
+            raise ValidationError(_("You cannot create recursive customer types."))
+
+    @api.model
+    @tools.ormcache('type_id')
+    def _get_ancestor_ids(self, type_id):
+        """Return the ids of the customer type and of its ancestors, nearest
+        first, in which pricing rules are looked up. Cached per type until the
+        hierarchy changes."""
+        if not type_id:
+            return ()
+        parent_path = self.sudo().browse(type_id).parent_path or '%s/' % type_id
+        return tuple(int(ancestor_id) for ancestor_id in reversed(parent_path.strip('/').split('/')))
+
+    @api.model
+    def _get_min_margins(self, type_ids):
+        """Return the minimum margin of each customer type id, inherited from
+        the nearest ancestor having one, with one read for all the types."""
+        chains = {type_id: self._get_ancestor_ids(type_id) for type_id in type_ids}
+        types = self.browse({ancestor_id for chain in chains.values() for ancestor_id in chain})
+        types.fetch(['min_margin_per'])
+        margins = {ctype.id: ctype.min_margin_per for ctype in types if ctype.min_margin_per}
+        result = {}
+        for type_id, chain in chains.items():
+            margin_type_id = resolve_customer_type(margins, chain)
+            result[type_id] = margins[margin_type_id] if margin_type_id else 0.0
+        return result
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        types = super().create(vals_list)
+        # prices of the new types are inherited from their parents
+        if types.parent_id:
+            self.env['product.customer.price']._mark_all()
+        return types
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'parent_id' in vals:
+            self.env.registry.clear_cache()
+            self.env['product.customer.price']._mark_all()
+        return res
@@ -1,4 +1,15 @@
-from odoo import models, fields, api
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import float_compare, str2bool
+
+from ..lib.pricing_core import find_table_row, landing_price, resolve_customer_type
+from .product_pricing_rule import PRICING_FAMILIES
+
+MARGIN_FLOOR_PARAM = 'pricelist_extended_tek_17.margin_floor_check'
+# violations listed in the confirmation error, the others are counted
+MARGIN_FLOOR_MAX_LISTED = 50
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -17,6 +28,18 @@ class SaleOrder(models.Model):
         string="Customer Type"
     )
 
+    tier_aggregation = fields.Selection(
+        [
+            ('line', 'Per Line'),
+            ('product', 'Per Product'),
+            ('template', 'Per Product Template'),
+        ],
+        string="Quantity Tiers",
+        default='line',
+        help="Quantity used to pick the quantity tiers: the quantity of each line, "
+             "or the total quantity of the product (or template) over all the lines of the order",
+    )
+
     @api.onchange('partner_id')
     def _onchange_partner_id_set_pricing_and_customer_type(self):
         if self.partner_id:
@@ -27,27 +50,95 @@ class SaleOrder(models.Model):
             self.pricing_type = False
             self.customer_type_id = False
 
-    @api.model
-    def create(self, vals):
-        # if no value passed, fetch from partner
+    @api.onchange('order_line', 'tier_aggregation')
+    def _onchange_order_line_cumulative_tiers(self):
+        # a quantity change on one line moves the tier of its sibling lines
+        if self.pricing_type != 'quantity' or self.tier_aggregation not in ('product', 'template'):
+            return
+        lines = self.order_line
+        if self.tier_aggregation == self._origin.tier_aggregation:
+            # only the groups of the lines whose product or quantity changed
+            changed = lines.filtered(lambda l: l.product_id != l._origin.product_id
+                                     or l.product_uom_qty != l._origin.product_uom_qty)
+            groups = {line._get_tier_group() for line in changed}
+            lines = lines.filtered(lambda l: l._get_tier_group() in groups)
+        # keep the prices typed by hand
+        lines.filtered(lambda l: not l._has_manual_price())._apply_extended_pricing()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # if no value passed, fetch from partner, with one read for all orders
+        partners = self.env['res.partner'].browse(
+            {vals['partner_id'] for vals in vals_list if vals.get('partner_id')}
+        )
+        partners.fetch(['pricing_type', 'customer_type_id'])
+        for vals in vals_list:
+            if vals.get('partner_id'):
+                partner = partners.browse(vals['partner_id'])
+                if not vals.get('pricing_type'):
+                    vals['pricing_type'] = partner.pricing_type or 'quantity'
+                if not vals.get('customer_type_id'):
+                    vals['customer_type_id'] = partner.customer_type_id.id or False
+        return super().create(vals_list)
+
+    def write(self, vals):
         if vals.get('partner_id'):
+            # derive once for all orders, without altering the caller's dict
+            vals = dict(vals)
             partner = self.env['res.partner'].browse(vals['partner_id'])
-            if not vals.get('pricing_type'):
+            if 'pricing_type' not in vals:
                 vals['pricing_type'] = partner.pricing_type or 'quantity'
-            if not vals.get('customer_type_id'):
+            if 'customer_type_id' not in vals:
                 vals['customer_type_id'] = partner.customer_type_id.id or False
-        return super().create(vals)
-
-    def write(self, vals):
-        for order in self:
-            if vals.get('partner_id'):
-                partner = self.env['res.partner'].browse(vals['partner_id'])
-                if 'pricing_type' not in vals:
-                    vals['pricing_type'] = partner.pricing_type or 'quantity'
-                if 'customer_type_id' not in vals:
-                    vals['customer_type_id'] = partner.customer_type_id.id or False
         return super().write(vals)
 
+    def action_confirm(self):
+        if str2bool(self.env['ir.config_parameter'].sudo().get_param(MARGIN_FLOOR_PARAM, 'False')):
+            self._check_margin_floor()
+        return super().action_confirm()
+
+    def _check_margin_floor(self):
+        """Check the net unit price of all the lines of the orders against
+        the landing price plus the minimum margin of the customer type, and
+        raise one error listing all the lines below it."""
+        lines = self.order_line.filtered(lambda l: not l.display_type and l.product_id)
+        lines.fetch(['order_id', 'product_id', 'product_uom', 'price_unit', 'discount'])
+        lines.product_id.fetch(['landing_price', 'uom_id'])
+        customer_types = self.customer_type_id | self.partner_id.customer_type_id
+        min_margins = self.env['res.partner.customer.type']._get_min_margins(customer_types.ids)
+
+        violations = []
+        for line in lines:
+            order = line.order_id
+            product = line.product_id
+            if not product.landing_price:
+                continue
+            customer_type = order.customer_type_id or order.partner_id.customer_type_id
+            min_margin = min_margins.get(customer_type.id, 0.0)
+            floor = landing_price(product.landing_price, min_margin)
+            if line.product_uom != product.uom_id:
+                floor = product.uom_id._compute_price(floor, line.product_uom)
+            if order.currency_id != order.company_id.currency_id:
+                floor = order.company_id.currency_id._convert(
+                    floor, order.currency_id, order.company_id, order.date_order or fields.Date.today())
+            price = line.price_unit * (1 - (line.discount or 0.0) / 100)
+            if float_compare(price, floor, precision_rounding=order.currency_id.rounding) < 0:
+                violations.append(_(
+                    "%(order)s - %(product)s: %(price)s, minimum %(floor)s (%(margin)s%% margin)",
+                    order=order.name,
+                    product=product.display_name,
+                    price=order.currency_id.round(price),
+                    floor=order.currency_id.round(floor),
+                    margin=min_margin,
+                ))
+        if violations:
+            message = "\n".join(violations[:MARGIN_FLOOR_MAX_LISTED])
+            if len(violations) > MARGIN_FLOOR_MAX_LISTED:
+                message += "\n" + _("... and %s more lines", len(violations) - MARGIN_FLOOR_MAX_LISTED)
+            raise UserError(_(
+                "These lines are priced below the minimum margin on the landing price:\n%s", message))
+
+
 class SaleOrderLine(models.Model):
     _inherit = 'sale.order.line'
 
@@ -57,6 +148,53 @@ class SaleOrderLine(models.Model):
         store=False
     )
 
+    pricing_table = fields.Json(
+        string="Pricing Table",
+        compute="_compute_pricing_table",
+        help="[min qty, max qty, price, rule id, family, rule kind, margin, base price] rows of the "
+             "rules applicable to the line, kept in the form so that quantity changes don't read the "
+             "rules again",
+    )
+
+    # rule that produced the unit price, as it was when the line was priced
+    pricing_rule_id = fields.Many2one(
+        'product.pricing.rule', string="Applied Rule", readonly=True, copy=False,
+        index='btree_not_null', ondelete='set null',
+    )
+    pricing_family = fields.Selection(PRICING_FAMILIES, string="Applied Pricing Type", readonly=True, copy=False,
+                                      index=True)
+    pricing_rule_kind = fields.Selection([
+        ('qty', 'Quantity'),
+        ('customer', 'Customer Type'),
+    ], string="Applied Rule Kind", readonly=True, copy=False)
+    pricing_base_price = fields.Float("Applied Base Price", readonly=True, copy=False,
+                                      help="Landing price (regular) or MRP price (LP) the rule price was computed from")
+    pricing_margin_per = fields.Float("Applied Margin (%)", readonly=True, copy=False)
+    pricing_rule_price = fields.Float("Applied Rule Price", readonly=True, copy=False)
+
+    @api.depends('product_id', 'order_id.pricing_type', 'order_id.customer_type_id', 'order_id.partner_id')
+    def _compute_pricing_table(self):
+        """Tiers of the product for quantity pricing, or a single unbounded
+        row with the customer type price, from the cached tables of the
+        templates of all lines."""
+        lines = self.filtered(lambda l: l.product_id and l.order_id.partner_id)
+        (self - lines).pricing_table = False
+        tables = self.env['product.template']._get_pricing_tables(lines.product_id.product_tmpl_id.ids)
+        CustomerType = self.env['res.partner.customer.type']
+        for line in lines:
+            order = line.order_id
+            # Order classification, derived from the partner unless changed on the order
+            pricing_type = order.pricing_type or order.partner_id.pricing_type
+            qty_table, customer_tables = tables[line.product_id.product_tmpl_id.id]
+            if pricing_type == 'fixed':
+                # nearest customer type of the hierarchy having a price
+                customer_type = order.customer_type_id or order.partner_id.customer_type_id
+                type_id = resolve_customer_type(customer_tables, CustomerType._get_ancestor_ids(customer_type.id))
+                table = customer_tables[type_id] if type_id else False
+            else:
+                table = pricing_type == 'quantity' and qty_table or False
+            line.pricing_table = table
+
     @api.depends('product_id')
     def _compute_price_info(self):
         """Compute basic price info display"""
@@ -197,86 +335,70 @@ class SaleOrderLine(models.Model):
                     }
                 }
 
+    def _get_product_price_context(self):
+        """Classification of the order for the extended pricelist items"""
+        res = super()._get_product_price_context()
+        order = self.order_id
+        res.update(
+            pricing_partner_id=order.partner_id.id,
+            extended_pricing_type=order.pricing_type,
+            extended_customer_type_id=order.customer_type_id.id,
+        )
+        return res
+
     @api.onchange("product_id","product_uom_qty")
     def _onchange_product_id_pricing(self):
-        for line in self:
-            if not line.product_id or not line.order_id.partner_id:
-                continue
-
-            partner = line.order_id.partner_id
-            product = line.product_id.product_tmpl_id
-            qty = line.product_uom_qty or 1.0
-            price = 0.0
-
-            # Check partner pricing type
-            if partner.pricing_type == "fixed":
-                # product regular → use customer_pricing_ids
-                if product.pricing_type == "regular":
-                    customer_line = product.customer_pricing_ids.filtered(
-                        lambda cp: cp.customer_type_id == partner.customer_type_id
-                    )
-                    if customer_line:
-                        price = customer_line[0].amount
-
-                # product lp_based → use customer_lp_pricing_ids
-                elif product.pricing_type == "lp_based":
-                    customer_line = product.customer_lp_pricing_ids.filtered(
-                        lambda cp: cp.customer_type_id == partner.customer_type_id
-                    )
-                    if customer_line:
-                        price = customer_line[0].amount
-
-                elif product.pricing_type == "lp_based_purchase":
-                    customer_line = product.customer_lp_purchase_ids.filtered(
-                        lambda cp: cp.customer_type_id == partner.customer_type_id
-                    )
-                    if customer_line:
-                        price = customer_line[0].amount
-
-
-            elif partner.pricing_type == "quantity":
-
-                if product.pricing_type == "regular":
-
-                    qty_line = product.qty_pricing_ids.filtered(
-
-                        lambda qp: (not qp.min_qty or qty >= qp.min_qty)
-
-                                   and (not qp.max_qty or qty <= qp.max_qty)  # strict check
-
-                    )
-
-                    if qty_line:
-                        price = qty_line[0].amount
-
-
-                elif product.pricing_type == "lp_based":
-
-                    qty_line = product.qty_lp_pricing_ids.filtered(
-
-                        lambda qp: (not qp.min_qty or qty >= qp.min_qty)
-
-                                   and (not qp.max_qty or qty <= qp.max_qty)  # strict check
-
-                    )
-
-                    if qty_line:
-                        price = qty_line[0].amount
-
-                elif product.pricing_type == "lp_based_purchase":
-
-                    qty_line = product.qty_lp_purchase_ids.filtered(
-
-                        lambda qp: (not qp.min_qty or qty >= qp.min_qty)
-
-                                   and (not qp.max_qty or qty <= qp.max_qty)  # strict check
-
-                    )
-
-                    if qty_line:
-                        price = qty_line[0].amount
+        with self.env['pricing.stage.sample']._profile('order_line_pricing') as sample:
+            sample['records'] = len(self)
+            self._apply_extended_pricing()
+
+    def _apply_extended_pricing(self):
+        """Set the unit price of the lines from their pricing table, and
+        record the rule and base price it comes from"""
+        # quantities summed over the orders in cumulative tier mode, in one pass
+        totals = defaultdict(float)
+        for line in self.order_id.order_line:
+            group = line._get_tier_group()
+            if group:
+                totals[group] += line.product_uom_qty
 
+        for line in self:
+            row = None
+            if line.pricing_table:
+                group = line._get_tier_group()
+                qty = totals[group] if group else line.product_uom_qty
+                row = find_table_row(line.pricing_table, qty or 1.0)
             # If no price found → fallback to normal Odoo price
-            if price:
-                line.price_unit = price
-
+            if not row or not row[2]:
+                if line.pricing_family:
+                    line.update(dict.fromkeys(
+                        ['pricing_rule_id', 'pricing_family', 'pricing_rule_kind', 'pricing_base_price',
+                         'pricing_margin_per', 'pricing_rule_price'], False))
+                continue
+            _min_qty, _max_qty, price, rule_id, family, rule_kind, margin_per, base_price = row
+            line.update({
+                'price_unit': price,
+                'pricing_rule_id': rule_id,
+                'pricing_family': family,
+                'pricing_rule_kind': rule_kind,
+                'pricing_base_price': base_price,
+                'pricing_margin_per': margin_per,
+                'pricing_rule_price': price,
+            })
+
+    def _has_manual_price(self):
+        """Whether the unit price of the line was changed from the price of
+        the rule it was priced with"""
+        digits = self.env['decimal.precision'].precision_get('Product Price')
+        return bool(self.pricing_family) and float_compare(
+            self.price_unit, self.pricing_rule_price, precision_digits=digits) != 0
+
+    def _get_tier_group(self):
+        """Key of the lines whose quantities are summed to pick the tier of
+        this line, or None when the line is priced on its own quantity."""
+        order = self.order_id
+        if not self.product_id or order.tier_aggregation not in ('product', 'template'):
+            return None
+        if order.tier_aggregation == 'product':
+            return order, self.product_id
+        return order, self.product_id.product_tmpl_id
@@ -0,0 +1,189 @@
+import logging
+
+from odoo import models, fields, api
+
+from ..models.product_pricing_rule import PRICING_FAMILIES, TIER_RANGE
+
+_logger = logging.getLogger(__name__)
+
+WATERMARK_PARAM = 'pricelist_extended_tek_17.margin_report_refreshed_at'
+
+
+class SaleLandingMarginReport(models.Model):
+    """Realised margin of confirmed order lines against the landing price and
+    the pricing rule that should have applied.
+
+    This is a plain table and not a SQL view: joining the rules on a year of
+    order lines at each pivot read is too slow, so the rows are upserted by
+    ``_refresh_report`` for the lines and orders modified since the last run.
+    Prices are the ones known at refresh time, landing costs are computed on
+    the quantity in the product unit.
+
+    Lines priced before the applied rule was recorded on them fall back to
+    the rule of the product matching the order today. Lines of products
+    using a price grid, or sold in another unit than the product's, are left
+    without rule in that case: their rule price cannot be told from the
+    current rules.
+    """
+    _name = 'sale.landing.margin.report'
+    _description = "Landing Margin Analysis"
+    _order = 'date desc, id desc'
+    _rec_name = 'line_id'
+
+    _sql_constraints = [
+        ('line_uniq', 'unique(line_id)', "An order line can only be reported once."),
+    ]
+
+    line_id = fields.Many2one('sale.order.line', string="Order Line", readonly=True, ondelete='cascade')
+    order_id = fields.Many2one('sale.order', string="Order", readonly=True, index=True)
+    date = fields.Datetime("Order Date", readonly=True, index=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+    user_id = fields.Many2one('res.users', string="Salesperson", readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string="Customer", readonly=True)
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type", readonly=True, index=True)
+    order_pricing_type = fields.Selection([
+        ('quantity', 'Quantity Wise'),
+        ('fixed', 'Customer Type'),
+    ], string="Order Pricing", readonly=True)
+    product_id = fields.Many2one('product.product', string="Product Variant", readonly=True)
+    product_tmpl_id = fields.Many2one('product.template', string="Product", readonly=True, index=True)
+    categ_id = fields.Many2one('product.category', string="Product Category", readonly=True)
+    family = fields.Selection(PRICING_FAMILIES, string="Pricing Type", readonly=True)
+    rule_id = fields.Many2one('product.pricing.rule', string="Applicable Rule", readonly=True)
+
+    qty = fields.Float("Quantity", readonly=True)
+    price_unit = fields.Float("Unit Price", readonly=True, group_operator='avg')
+    revenue = fields.Float("Revenue", readonly=True)
+    landing_price = fields.Float("Landing Price", readonly=True, group_operator='avg')
+    mrp_price = fields.Float("MRP Price", readonly=True, group_operator='avg')
+    landing_cost = fields.Float("Landing Cost", readonly=True)
+    margin = fields.Float("Margin", readonly=True)
+    rule_price = fields.Float("Rule Price", readonly=True, group_operator='avg')
+    rule_revenue = fields.Float("Rule Revenue", readonly=True)
+    price_gap = fields.Float("Gap to Rule", readonly=True,
+                             help="Revenue minus the revenue at the price of the applicable rule")
+
+    @api.model
+    def _refresh_report(self, full=False):
+        """Upsert the rows of the order lines modified since the last refresh
+        and drop the rows of the orders that are no longer confirmed."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        since = False if full else ICP.get_param(WATERMARK_PARAM)
+        self.env['sale.order.line'].flush_model()
+        self.env['sale.order'].flush_model()
+        self.env['product.product'].flush_model(['landing_price', 'mrp_price'])
+        self.env['product.template'].flush_model(['landing_price', 'mrp_price', 'pricing_type', 'categ_id'])
+        self.env['product.pricing.rule'].flush_model()
+
+        cr = self.env.cr
+        # taken before reading the lines so that concurrent changes are picked up next time;
+        # write_date is the start of the writing transaction, so the transactions still open
+        # may commit rows dated before now(): start the next refresh at the oldest of them
+        cr.execute("""
+            SELECT min(xact_start) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database() AND xact_start IS NOT NULL
+        """)
+        refreshed_at = cr.fetchone()[0]
+
+        params = {'uid': self.env.uid, 'since': since}
+        changed = "AND (sol.write_date >= %(since)s OR so.write_date >= %(since)s)" if since else ""
+        cr.execute("""
+            INSERT INTO sale_landing_margin_report (
+                line_id, order_id, date, company_id, user_id, partner_id, customer_type_id,
+                order_pricing_type, product_id, product_tmpl_id, categ_id, family, rule_id,
+                qty, price_unit, revenue, landing_price, mrp_price, landing_cost, margin,
+                rule_price, rule_revenue, price_gap,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT sol.id, so.id, so.date_order, so.company_id, so.user_id, so.partner_id, so.customer_type_id,
+                   so.pricing_type, pp.id, pt.id, pt.categ_id, pt.pricing_type, applied.rule_id,
+                   sol.product_uom_qty, sol.price_unit, sol.price_subtotal,
+                   base.landing_price, base.mrp_price,
+                   base.landing_price * base.qty,
+                   sol.price_subtotal - base.landing_price * base.qty,
+                   applied.price, applied.price * sol.product_uom_qty,
+                   sol.price_subtotal - applied.price * sol.product_uom_qty,
+                   %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM sale_order_line sol
+              JOIN sale_order so ON so.id = sol.order_id
+              JOIN product_product pp ON pp.id = sol.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+         LEFT JOIN uom_uom line_uom ON line_uom.id = sol.product_uom
+         LEFT JOIN uom_uom product_uom ON product_uom.id = pt.uom_id
+         LEFT JOIN res_partner_customer_type oct ON oct.id = so.customer_type_id
+        CROSS JOIN LATERAL (
+                   SELECT COALESCE(NULLIF(pp.landing_price, 0), pt.landing_price, 0) AS landing_price,
+                          COALESCE(NULLIF(pp.mrp_price, 0), pt.mrp_price, 0) AS mrp_price,
+                          -- quantity in the product unit, as uom.uom._compute_quantity
+                          CASE WHEN sol.product_uom = pt.uom_id THEN sol.product_uom_qty
+                               ELSE sol.product_uom_qty / line_uom.factor * product_uom.factor END AS qty
+                   ) base
+         LEFT JOIN LATERAL (
+                   -- the rule the order line pricing looks up on the template
+                   -- customer type rules fall back to the nearest ancestor type
+                   SELECT r.id, r.amount
+                     FROM product_pricing_rule r
+                LEFT JOIN res_partner_customer_type rct ON rct.id = r.customer_type_id
+                    WHERE r.product_tmpl_id = pt.id
+                      AND r.family = pt.pricing_type
+                      AND pt.price_grid_id IS NULL
+                      AND sol.product_uom = pt.uom_id
+                      AND ((so.pricing_type = 'fixed' AND r.rule_kind = 'customer'
+                            AND oct.parent_path LIKE rct.parent_path || '%%')
+                        OR (COALESCE(so.pricing_type, 'quantity') = 'quantity' AND r.rule_kind = 'qty'
+                            AND {tier_range} @> COALESCE(NULLIF(sol.product_uom_qty, 0), 1)::numeric))
+                 ORDER BY length(rct.parent_path) DESC NULLS LAST, r.min_qty, r.id
+                    LIMIT 1
+                   ) rule ON TRUE
+        CROSS JOIN LATERAL (
+                   -- the rule recorded when the line was priced, else the current one
+                   SELECT CASE WHEN sol.pricing_family IS NOT NULL THEN sol.pricing_rule_id ELSE rule.id END AS rule_id,
+                          CASE WHEN sol.pricing_family IS NOT NULL THEN sol.pricing_rule_price ELSE rule.amount END AS price
+                   ) applied
+             WHERE so.state = 'sale'
+               AND sol.display_type IS NULL
+               {changed}
+        ON CONFLICT (line_id) DO UPDATE SET
+                order_id = EXCLUDED.order_id,
+                date = EXCLUDED.date,
+                company_id = EXCLUDED.company_id,
+                user_id = EXCLUDED.user_id,
+                partner_id = EXCLUDED.partner_id,
+                customer_type_id = EXCLUDED.customer_type_id,
+                order_pricing_type = EXCLUDED.order_pricing_type,
+                product_id = EXCLUDED.product_id,
+                product_tmpl_id = EXCLUDED.product_tmpl_id,
+                categ_id = EXCLUDED.categ_id,
+                family = EXCLUDED.family,
+                rule_id = EXCLUDED.rule_id,
+                qty = EXCLUDED.qty,
+                price_unit = EXCLUDED.price_unit,
+                revenue = EXCLUDED.revenue,
+                landing_price = EXCLUDED.landing_price,
+                mrp_price = EXCLUDED.mrp_price,
+                landing_cost = EXCLUDED.landing_cost,
+                margin = EXCLUDED.margin,
+                rule_price = EXCLUDED.rule_price,
+                rule_revenue = EXCLUDED.rule_revenue,
+                price_gap = EXCLUDED.price_gap,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """.format(tier_range=TIER_RANGE.format(alias='r.'), changed=changed), params)
+        upserted = cr.rowcount
+
+        # cancelled or reset orders; deleted lines cascade
+        cr.execute("""
+            DELETE FROM sale_landing_margin_report rep
+             USING sale_order so
+             WHERE so.id = rep.order_id
+               AND so.state != 'sale'
+               {changed}
+        """.format(changed="AND so.write_date >= %(since)s" if since else ""), params)
+        removed = cr.rowcount
+
+        ICP.set_param(WATERMARK_PARAM, refreshed_at)
+        self.invalidate_model()
+        _logger.info("Landing margin report refreshed: %d lines upserted, %d removed", upserted, removed)
+        return True
+
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Concurrent load test of the pricing paths of a running Odoo instance.
+
+Simulates N salespeople over XML-RPC, one scenario after the other:
+
+- ``order``: create a sale order with a few lines,
+- ``quantity``: change the quantity of an order line (onchange, which runs
+  ``_onchange_product_id_pricing``),
+- ``price_details``: open the price details wizard of an order line,
+- ``vendor_bill``: create and post a vendor bill, which propagates the
+  product costs (``AccountMove.action_post``).
+
+For each scenario, it reports the latency percentiles, the throughput,
+the errors and the serialization failures returned to the clients. Odoo
+retries them a few times before giving up, so the count only includes
+requests that failed for good. With ``--dsn`` (needs psycopg2), it also
+samples the backends waiting for a lock and counts new deadlocks.
+
+Run against a test database, it creates orders and posts bills::
+
+    python3 pricing_load_test.py --url http://localhost:8069 --db test \\
+        --login admin --password admin --users 20 --duration 60 \\
+        --dsn "dbname=test"
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+import xmlrpc.client
+from collections import defaultdict
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+SCENARIOS = ['order', 'quantity', 'price_details', 'vendor_bill']
+SERIALIZATION_ERRORS = ('could not serialize access', 'SerializationFailure', 'concurrent update')
+
+
+class Client:
+    """XML-RPC connection of one simulated user; ServerProxy objects are not
+    thread-safe, so each thread has its own."""
+
+    def __init__(self, args):
+        self.db = args.db
+        self.password = args.password
+        common = xmlrpc.client.ServerProxy('%s/xmlrpc/2/common' % args.url)
+        self.uid = common.authenticate(args.db, args.login, args.password, {})
+        if not self.uid:
+            raise SystemExit("Authentication failed for %s" % args.login)
+        self.models = xmlrpc.client.ServerProxy('%s/xmlrpc/2/object' % args.url, allow_none=True)
+
+    def call(self, model, method, *args, **kwargs):
+        return self.models.execute_kw(self.db, self.uid, self.password, model, method, list(args), kwargs)
+
+
+class Catalog:
+    """Records the scenarios pick from, read once before the run"""
+
+    def __init__(self, client, args):
+        self.products = client.call(
+            'product.product', 'search', [('sale_ok', '=', True), ('pricing_type', '!=', False)],
+            limit=args.products)
+        self.customers = client.call(
+            'res.partner', 'search', [('pricing_type', 'in', ['quantity', 'fixed'])], limit=50)
+        self.vendors = client.call('res.partner', 'search', [('supplier_rank', '>', 0)], limit=10) \
+            or self.customers[:1]
+        if not self.products or not self.customers:
+            raise SystemExit("Need products with a pricing type and customers with a pricing type")
+
+
+class Stats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.serialization_failures = 0
+        self.error_samples = []
+
+    def add(self, latency, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies.append(latency)
+                return
+            self.errors += 1
+            if any(marker in error for marker in SERIALIZATION_ERRORS):
+                self.serialization_failures += 1
+            if len(self.error_samples) < 3:
+                self.error_samples.append(error.strip().splitlines()[-1][:200])
+
+
+class LockSampler(threading.Thread):
+    """Samples the backends of the database waiting for a lock"""
+
+    def __init__(self, dsn, interval):
+        super().__init__(daemon=True)
+        self.dsn = dsn
+        self.interval = interval
+        self.samples = []
+        self.max_wait = 0.0
+        self.stop = threading.Event()
+
+    def run(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        with conn.cursor() as cr:
+            while not self.stop.wait(self.interval):
+                cr.execute("""
+                    SELECT count(*), COALESCE(max(EXTRACT(EPOCH FROM now() - state_change)), 0)
+                      FROM pg_stat_activity
+                     WHERE datname = current_database() AND wait_event_type = 'Lock'
+                """)
+                waiting, wait = cr.fetchone()
+                self.samples.append(waiting)
+                self.max_wait = max(self.max_wait, float(wait))
+        conn.close()
+
+
+def count_deadlocks(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cr:
+            cr.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+            return cr.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def new_order(client, catalog, rng, lines):
+    return client.call('sale.order', 'create', {
+        'partner_id': rng.choice(catalog.customers),
+        'order_line': [
+            (0, 0, {'product_id': rng.choice(catalog.products), 'product_uom_qty': rng.randint(1, 100)})
+            for _i in range(lines)
+        ],
+    })
+
+
+def user_loop(scenario, args, catalog, stats, deadline, seed):
+    rng = random.Random(seed)
+    client = Client(args)
+    line_ids = []
+    wizard_fields = {}
+    if scenario in ('quantity', 'price_details'):
+        # the order edited by this user, not measured
+        order_id = new_order(client, catalog, rng, args.lines)
+        line_ids = client.call('sale.order.line', 'search', [('order_id', '=', order_id)])
+
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            if scenario == 'order':
+                new_order(client, catalog, rng, args.lines)
+            elif scenario == 'quantity':
+                client.call(
+                    'sale.order.line', 'onchange', [rng.choice(line_ids)],
+                    {'product_uom_qty': rng.randint(1, 100)}, ['product_uom_qty'],
+                    {'product_id': {}, 'product_uom_qty': {}, 'price_unit': {}, 'pricing_table': {}},
+                )
+            elif scenario == 'price_details':
+                action = client.call('sale.order.line', 'action_show_price_details', [rng.choice(line_ids)])
+                if action:
+                    model = action['res_model']
+                    if model not in wizard_fields:
+                        wizard_fields[model] = list(client.call(model, 'fields_get', attributes=['type']))
+                    client.call(model, 'default_get', wizard_fields[model], context=action['context'])
+            elif scenario == 'vendor_bill':
+                bill_id = client.call('account.move', 'create', {
+                    'move_type': 'in_invoice',
+                    'partner_id': rng.choice(catalog.vendors),
+                    'invoice_date': time.strftime('%Y-%m-%d'),
+                    'invoice_line_ids': [
+                        (0, 0, {
+                            'product_id': rng.choice(catalog.products),
+                            'quantity': rng.randint(1, 50),
+                            'price_unit': round(rng.uniform(10, 500), 2),
+                        })
+                        for _i in range(args.lines)
+                    ],
+                })
+                client.call('account.move', 'action_post', [bill_id])
+        except xmlrpc.client.Fault as fault:
+            stats.add(time.monotonic() - start, fault.faultString)
+        except (OSError, xmlrpc.client.ProtocolError) as error:
+            stats.add(time.monotonic() - start, repr(error))
+        else:
+            stats.add(time.monotonic() - start)
+
+
+def run_scenario(scenario, args, catalog):
+    stats = Stats()
+    sampler = None
+    deadlocks = None
+    if args.dsn:
+        sampler = LockSampler(args.dsn, args.lock_interval)
+        deadlocks = count_deadlocks(args.dsn)
+        sampler.start()
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=user_loop, args=(scenario, args, catalog, stats, deadline, args.seed + index))
+        for index in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    result = {'scenario': scenario, 'elapsed': elapsed, 'stats': stats}
+    if sampler:
+        sampler.stop.set()
+        sampler.join()
+        result['lock_samples'] = sampler.samples
+        result['max_lock_wait'] = sampler.max_wait
+        result['deadlocks'] = count_deadlocks(args.dsn) - deadlocks
+    return result
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def report(results):
+    header = "%-14s %7s %8s %8s %8s %8s %8s %8s %6s %6s" % (
+        "scenario", "ops", "ops/s", "p50 ms", "p90 ms", "p95 ms", "p99 ms", "max ms", "errors", "serial")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        stats = result['stats']
+        latencies = [latency * 1000 for latency in stats.latencies]
+        print("%-14s %7d %8.1f %8.0f %8.0f %8.0f %8.0f %8.0f %6d %6d" % (
+            result['scenario'], len(latencies), len(latencies) / result['elapsed'],
+            percentile(latencies, 50), percentile(latencies, 90), percentile(latencies, 95),
+            percentile(latencies, 99), max(latencies, default=0.0),
+            stats.errors, stats.serialization_failures,
+        ))
+    if any('lock_samples' in result for result in results):
+        print()
+        print("%-14s %12s %12s %12s %10s" % ("scenario", "avg waiting", "max waiting", "max wait s", "deadlocks"))
+        for result in results:
+            samples = result['lock_samples'] or [0]
+            print("%-14s %12.2f %12d %12.2f %10d" % (
+                result['scenario'], statistics.mean(samples), max(samples),
+                result['max_lock_wait'], result['deadlocks'],
+            ))
+    errors = defaultdict(list)
+    for result in results:
+        errors[result['scenario']].extend(result['stats'].error_samples)
+    for scenario, samples in errors.items():
+        for sample in samples:
+            print("%s error: %s" % (scenario, sample))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--users', type=int, default=10, help="concurrent simulated users")
+    parser.add_argument('--duration', type=float, default=30, help="seconds per scenario")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help="scenario to run, can be repeated (default: all)")
+    parser.add_argument('--lines', type=int, default=5, help="lines per order or vendor bill")
+    parser.add_argument('--products', type=int, default=200, help="number of products picked from")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dsn', help="PostgreSQL DSN of the database, to sample lock waits and deadlocks")
+    parser.add_argument('--lock-interval', type=float, default=0.2, help="seconds between lock samples")
+    args = parser.parse_args()
+    if args.dsn and psycopg2 is None:
+        parser.error("--dsn needs psycopg2")
+
+    catalog = Catalog(Client(args), args)
+    results = []
+    for scenario in args.scenario or SCENARIOS:
+        print("Running %s: %d users for %ss" % (scenario, args.users, args.duration))
+        results.append(run_scenario(scenario, args, catalog))
+    print()
+    report(results)
+
+
+if __name__ == '__main__':
+    main()
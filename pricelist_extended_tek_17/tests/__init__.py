@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+from . import test_pricing_benchmark
+from . import test_query_count
+from . import test_cumulative_tiers
+from . import test_margin_floor
+from . import test_customer_price
+from . import test_pricing_cache
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from odoo import Command, fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+# Rule one2manys holding the quantity tiers and customer type rules of
+# each product pricing type.
+FAMILY_FIELDS = {
+    'regular': ('qty_pricing_ids', 'customer_pricing_ids'),
+    'lp_based': ('qty_lp_pricing_ids', 'customer_lp_pricing_ids'),
+    'lp_based_purchase': ('qty_lp_purchase_ids', 'customer_lp_purchase_ids'),
+}
+
+# Price details wizards opened from the sale order line, with the one2many
+# filled by their default_get.
+PRICE_WIZARDS = [
+    ('price.fixed.wizard', 'qty_price_reg_ids'),
+    ('price.reg.cus.wizard', 'qty_price_ids'),
+    ('price.lp.fixed.wizard', 'qty_price_ids'),
+    ('price.lp.cus.wizard', 'qty_price_ids'),
+    ('price.lp.pur.fixed.wizard', 'qty_price_reg_ids'),
+    ('price.lp.cus.pur.wizard', 'qty_price_ids'),
+]
+
+
+class PricingCatalogCommon(AccountTestInvoicingCommon):
+    """Builds a synthetic catalog of N templates x M variants x K quantity
+    tiers x T customer types, spread over the three product pricing types."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Pricing Vendor'})
+
+    @classmethod
+    def _create_customer_types(cls, count):
+        return cls.env['res.partner.customer.type'].create([
+            {'name': f'Customer Type {index}'} for index in range(count)
+        ])
+
+    @classmethod
+    def _create_partners(cls, customer_type):
+        partner_qty = cls.env['res.partner'].create({
+            'name': 'Quantity Customer',
+            'pricing_type': 'quantity',
+        })
+        partner_fixed = cls.env['res.partner'].create({
+            'name': 'Trader Customer',
+            'pricing_type': 'fixed',
+            'customer_type_id': customer_type.id,
+        })
+        return partner_qty, partner_fixed
+
+    @classmethod
+    def _tier_bounds(cls, index, tier_size=10):
+        """Return the (min_qty, max_qty) of the tier at ``index``."""
+        return index * tier_size + 1, (index + 1) * tier_size
+
+    @classmethod
+    def _create_catalog(cls, n_templates, n_variants, n_tiers, customer_types, name='Pricing'):
+        attribute_line_vals = []
+        if n_variants > 1:
+            attribute = cls.env['product.attribute'].create({
+                'name': f'{name} Attribute',
+                'create_variant': 'always',
+                'value_ids': [Command.create({'name': f'Value {index}'}) for index in range(n_variants)],
+            })
+            attribute_line_vals = [Command.create({
+                'attribute_id': attribute.id,
+                'value_ids': [Command.set(attribute.value_ids.ids)],
+            })]
+
+        pricing_types = list(FAMILY_FIELDS)
+        templates = cls.env['product.template']
+        for index in range(n_templates):
+            pricing_type = pricing_types[index % len(pricing_types)]
+            qty_field, customer_field = FAMILY_FIELDS[pricing_type]
+            qty_lines = []
+            for tier in range(n_tiers):
+                min_qty, max_qty = cls._tier_bounds(tier)
+                qty_lines.append(Command.create({
+                    'min_qty': min_qty,
+                    'max_qty': max_qty,
+                    'margin_per': 5.0 * (n_tiers - tier),
+                }))
+            customer_lines = [Command.create({
+                'customer_type_id': customer_type.id,
+                'margin_per': 2.0 * (position + 1),
+            }) for position, customer_type in enumerate(customer_types)]
+            templates |= cls.env['product.template'].create({
+                'name': f'{name} Product {index}',
+                'type': 'consu',
+                'list_price': 100.0,
+                'pricing_type': pricing_type,
+                'last_purchase_price': 50.0 + index,
+                'operational_margin': 10.0,
+                'mrp_price': 200.0 + index,
+                'attribute_line_ids': attribute_line_vals,
+                qty_field: qty_lines,
+                customer_field: customer_lines,
+            })
+        return templates
+
+    @classmethod
+    def _create_template(cls, name, tiers=(), **vals):
+        """Return a regular template with a landing price of 100 and the
+        (min qty, max qty, margin) quantity ``tiers``."""
+        return cls.env['product.template'].create({
+            'name': name,
+            'type': 'consu',
+            'pricing_type': 'regular',
+            'last_purchase_price': 100.0,
+            'operational_margin': 0.0,
+            'qty_pricing_ids': [Command.create({
+                'min_qty': min_qty,
+                'max_qty': max_qty,
+                'margin_per': margin_per,
+            }) for min_qty, max_qty, margin_per in tiers],
+            **vals,
+        })
+
+    def _run_precommit(self):
+        """Run the precommit hooks as a commit would: stored customer prices,
+        price change log and pricing cache signal."""
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+
+    @classmethod
+    def _new_order(cls, partner, products, qty=1.0):
+        """Return an unsaved order with one line per product, as the order
+        form holds it while its onchanges run."""
+        return cls.env['sale.order'].new({
+            'partner_id': partner.id,
+            'pricing_type': partner.pricing_type,
+            'customer_type_id': partner.customer_type_id.id,
+            'order_line': [Command.create({
+                'product_id': product.id,
+                'product_uom_qty': qty,
+            }) for product in products],
+        })
+
+    @classmethod
+    def _create_vendor_bill(cls, products, quantity=5.0, price_unit=10.0):
+        return cls.env['account.move'].create({
+            'move_type': 'in_invoice',
+            'partner_id': cls.vendor.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [Command.create({
+                'product_id': product.id,
+                'quantity': quantity,
+                'price_unit': price_unit,
+                'tax_ids': [Command.clear()],
+            }) for product in products],
+        })
+
+    def _measure(self, func, keep=None):
+        """Run ``func`` on a cold cache and return its wall time (ms) and the
+        number of SQL queries it issued, pending writes included. The cached
+        values of the new records ``keep`` are kept, they are not stored
+        anywhere else."""
+        self.env.flush_all()
+        self._invalidate_all(keep)
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        func()
+        self.env.flush_all()
+        return {
+            'wall_time_ms': round((time.perf_counter() - start) * 1000.0, 3),
+            'queries': cr.sql_log_count - queries,
+        }
+
+    def _invalidate_all(self, keep=None):
+        """Invalidate the cache, except the values of the new records ``keep``"""
+        cache = self.env.cache
+        kept = [
+            (record, field, cache.get(record, field))
+            for record in (keep or [])
+            for field in cache.get_fields(record)
+        ]
+        self.env.invalidate_all()
+        for record, field, value in kept:
+            cache.set(record, field, value)
+
+    def _assert_lines_priced(self, lines):
+        """Check that the pricing rules priced all the ``lines``, so that the
+        measures are not taken on lines without pricing"""
+        self.assertTrue(lines)
+        unpriced = lines.filtered(lambda line: not line.pricing_family or not line.pricing_rule_price)
+        self.assertFalse(unpriced, "Lines not priced by the pricing rules: %s" % unpriced.product_id.mapped('name'))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import Form, tagged
+
+from .common import PricingCatalogCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCumulativeTiers(PricingCatalogCommon):
+    """Quantity tiers picked from the quantity of the product summed over
+    the lines of the order, in the order form."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Tier Customer', 'pricing_type': 'quantity'})
+        # 120 up to 10 units, 110 from 11 units
+        cls.product = cls._create_template(
+            'Tier Product', tiers=[(1.0, 10.0, 20.0), (11.0, 0.0, 10.0)]).product_variant_id
+
+    def _order_form(self, tier_aggregation, quantities):
+        order_form = Form(self.env['sale.order'])
+        order_form.partner_id = self.partner
+        order_form.tier_aggregation = tier_aggregation
+        for qty in quantities:
+            with order_form.order_line.new() as line:
+                line.product_id = self.product
+                line.product_uom_qty = qty
+        return order_form
+
+    def test_per_line_tiers(self):
+        order = self._order_form('line', [6.0, 6.0]).save()
+        self.assertEqual(order.order_line.mapped('price_unit'), [120.0, 120.0])
+
+    def test_lines_cross_tier_together(self):
+        # 6 + 6 units reach the second tier, that neither line reaches alone
+        order = self._order_form('product', [6.0, 6.0]).save()
+        self.assertEqual(order.order_line.mapped('price_unit'), [110.0, 110.0])
+        self.assertEqual(order.order_line.mapped('pricing_rule_price'), [110.0, 110.0])
+
+        # below the second tier again once a line is decreased
+        with Form(order) as order_form:
+            with order_form.order_line.edit(1) as line:
+                line.product_uom_qty = 4.0
+        self.assertEqual(order.order_line.mapped('price_unit'), [120.0, 120.0])
+
+    def test_manual_price_kept(self):
+        order_form = self._order_form('product', [6.0, 2.0, 2.0])
+        with order_form.order_line.edit(0) as line:
+            line.price_unit = 99.0
+        with order_form.order_line.edit(1) as line:
+            self.assertEqual(line.price_unit, 120.0)
+        # moves the lines of the product to the second tier
+        with order_form.order_line.edit(2) as line:
+            line.product_uom_qty = 6.0
+        order = order_form.save()
+        self.assertEqual(order.order_line.mapped('price_unit'), [99.0, 110.0, 110.0])
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import PricingCatalogCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCustomerPrice(PricingCatalogCommon):
+    """Stored customer type and first tier prices, refreshed at commit."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.customer_type = cls.env['res.partner.customer.type'].create({'name': 'Retailer'})
+        # the first tier starts above 1 unit
+        cls.template = cls._create_template('Stored Price Product', tiers=[(10.0, 50.0, 20.0), (51.0, 0.0, 10.0)])
+        cls.grid = cls.env['product.price.grid'].create({
+            'name': 'Stored Price Grid',
+            'family': 'regular',
+            'line_ids': [
+                Command.create({'rule_kind': 'qty', 'min_qty': 5.0, 'max_qty': 0.0, 'margin_per': 15.0}),
+                Command.create({'rule_kind': 'customer', 'customer_type_id': cls.customer_type.id,
+                                'margin_per': 8.0}),
+            ],
+        })
+        cls.grid_template = cls._create_template('Grid Price Product', price_grid_id=cls.grid.id)
+
+    def _stored_prices(self, template):
+        self.env['product.customer.price'].invalidate_model()
+        return {
+            (row.price_kind, row.customer_type_id.id): row.price
+            for row in self.env['product.customer.price'].search([('product_tmpl_id', '=', template.id)])
+        }
+
+    def test_refresh_all(self):
+        self.env.cr.execute("DELETE FROM product_customer_price")
+        self.env['product.customer.price']._refresh_all()
+        self.assertEqual(self._stored_prices(self.template), {('first_tier', False): 120.0})
+        self.assertEqual(self._stored_prices(self.grid_template), {
+            ('first_tier', False): 115.0,
+            ('customer', self.customer_type.id): 108.0,
+        })
+
+    def test_rule_change(self):
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.template), {('first_tier', False): 120.0})
+
+        first_tier = self.template.qty_pricing_ids.filtered(lambda rule: rule.min_qty == 10.0)
+        first_tier.margin_per = 30.0
+        self.template.customer_pricing_ids = [Command.create({
+            'customer_type_id': self.customer_type.id,
+            'margin_per': 5.0,
+        })]
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.template), {
+            ('first_tier', False): 130.0,
+            ('customer', self.customer_type.id): 105.0,
+        })
+
+    def test_landing_price_change(self):
+        self.template.last_purchase_price = 200.0
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.template), {('first_tier', False): 240.0})
+
+    def test_grid_change(self):
+        self.grid.line_ids.filtered(lambda line: line.rule_kind == 'qty').margin_per = 25.0
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.grid_template)[('first_tier', False)], 125.0)
+
+    def test_grid_archived(self):
+        self._run_precommit()
+        self.assertTrue(self._stored_prices(self.grid_template))
+        self.grid.active = False
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.grid_template), {})
+
+    def test_grid_deleted(self):
+        self._run_precommit()
+        self.assertTrue(self._stored_prices(self.grid_template))
+        self.grid.unlink()
+        self._run_precommit()
+        self.assertEqual(self._stored_prices(self.grid_template), {})
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from odoo import Command
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from odoo.addons.pricelist_extended_tek_17.models.sale_order import MARGIN_FLOOR_PARAM
+
+from .common import PricingCatalogCommon
+
+
+@tagged('post_install', '-at_install')
+class TestMarginFloor(PricingCatalogCommon):
+    """Confirmation of orders priced below the landing price plus the minimum
+    margin of the customer type."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.parent_type = cls.env['res.partner.customer.type'].create({
+            'name': 'Distributor',
+            'min_margin_per': 20.0,
+        })
+        cls.child_type = cls.env['res.partner.customer.type'].create({
+            'name': 'Sub-distributor',
+            'parent_id': cls.parent_type.id,
+        })
+        cls.partner = cls.env['res.partner'].create({
+            'name': 'Floor Customer',
+            'pricing_type': 'fixed',
+            'customer_type_id': cls.parent_type.id,
+        })
+        cls.child_partner = cls.env['res.partner'].create({
+            'name': 'Floor Sub Customer',
+            'pricing_type': 'fixed',
+            'customer_type_id': cls.child_type.id,
+        })
+        # landing price 100: the floor is 120
+        cls.product = cls._create_template('Floor Product').product_variant_id
+
+    def _create_order(self, partner, price_unit):
+        return self.env['sale.order'].create({
+            'partner_id': partner.id,
+            'order_line': [Command.create({
+                'product_id': self.product.id,
+                'product_uom_qty': 1.0,
+                'price_unit': price_unit,
+            })],
+        })
+
+    def _enable_check(self, enabled=True):
+        self.env['ir.config_parameter'].sudo().set_param(MARGIN_FLOOR_PARAM, str(enabled))
+
+    def test_check_disabled(self):
+        self._enable_check(False)
+        order = self._create_order(self.partner, 105.0)
+        order.action_confirm()
+        self.assertEqual(order.state, 'sale')
+
+    def test_below_floor(self):
+        self._enable_check()
+        order = self._create_order(self.partner, 115.0)
+        with self.assertRaisesRegex(UserError, 'Floor Product'):
+            order.action_confirm()
+        self.assertEqual(order.state, 'draft')
+
+        order.order_line.price_unit = 120.0
+        order.action_confirm()
+        self.assertEqual(order.state, 'sale')
+
+    def test_discount_counts(self):
+        self._enable_check()
+        order = self._create_order(self.partner, 130.0)
+        order.order_line.discount = 10.0
+        with self.assertRaises(UserError):
+            order.action_confirm()
+
+    def test_floor_inherited_from_parent_type(self):
+        self._enable_check()
+        self.assertEqual(self.env['res.partner.customer.type']._get_min_margins(self.child_type.ids),
+                         {self.child_type.id: 20.0})
+        order = self._create_order(self.child_partner, 115.0)
+        with self.assertRaises(UserError):
+            order.action_confirm()
+
+        # a margin set on the child type takes precedence
+        self.child_type.min_margin_per = 10.0
+        order.action_confirm()
+        self.assertEqual(order.state, 'sale')
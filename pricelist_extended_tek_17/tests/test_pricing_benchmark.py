@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Synthetic-catalog benchmark of the pricing hot paths.
+
+Not part of the standard test run, start it explicitly with::
+
+    odoo-bin -d <db> -i pricelist_extended_tek_17 --test-tags pricing_benchmark
+
+The catalog size is read from the environment:
+
+- ``PRICING_BENCH_TEMPLATES``: number of templates (N, default 20)
+- ``PRICING_BENCH_VARIANTS``: variants per template (M, default 5)
+- ``PRICING_BENCH_TIERS``: quantity tiers per template (K, default 5)
+- ``PRICING_BENCH_CUSTOMER_TYPES``: customer types (T, default 5)
+- ``PRICING_BENCH_OUTPUT``: optional path of the JSON report to write
+"""
+
+import json
+import logging
+import os
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import PricingCatalogCommon, PRICE_WIZARDS
+
+_logger = logging.getLogger(__name__)
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+@tagged('post_install', '-at_install', '-standard', 'pricing_benchmark')
+class TestPricingBenchmark(PricingCatalogCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scale = {
+            'templates': _env_int('PRICING_BENCH_TEMPLATES', 20),
+            'variants': _env_int('PRICING_BENCH_VARIANTS', 5),
+            'tiers': _env_int('PRICING_BENCH_TIERS', 5),
+            'customer_types': _env_int('PRICING_BENCH_CUSTOMER_TYPES', 5),
+        }
+        cls.customer_types = cls._create_customer_types(cls.scale['customer_types'])
+        cls.partner_qty, cls.partner_fixed = cls._create_partners(cls.customer_types[-1])
+        cls.templates = cls._create_catalog(
+            cls.scale['templates'], cls.scale['variants'], cls.scale['tiers'], cls.customer_types,
+        )
+        cls.variants = cls.templates.product_variant_ids
+
+    def _report(self, results):
+        report = {'scale': self.scale, 'scenarios': results}
+        for result in results:
+            _logger.info(
+                "pricing benchmark %-32s records=%-7d wall=%10.3f ms queries=%d",
+                result['scenario'], result['records'], result['wall_time_ms'], result['queries'],
+            )
+        output = os.environ.get('PRICING_BENCH_OUTPUT')
+        if output:
+            with open(output, 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, indent=2)
+        return report
+
+    def _scenario(self, name, records, func, keep=None):
+        result = self._measure(func, keep=keep)
+        result.update(scenario=name, records=records)
+        return result
+
+    def test_pricing_hot_paths(self):
+        results = []
+        # mid-range quantity so that lines land on a middle tier
+        qty = self._tier_bounds(self.scale['tiers'] // 2)[0]
+
+        for partner in (self.partner_qty, self.partner_fixed):
+            order = self._new_order(partner, self.variants, qty=qty)
+            results.append(self._scenario(
+                f'order_line_pricing_{partner.pricing_type}', len(order.order_line),
+                lambda: order.order_line._onchange_product_id_pricing(),
+                keep=order | order.order_line,
+            ))
+            self._assert_lines_priced(order.order_line)
+
+        results.append(self._scenario(
+            'sync_pricing_to_variants', len(self.variants),
+            lambda: self.templates._sync_pricing_to_variants(),
+        ))
+
+        bill = self._create_vendor_bill(self.variants)
+        results.append(self._scenario(
+            'vendor_bill_post', len(bill.invoice_line_ids),
+            lambda: bill.action_post(),
+        ))
+
+        order = self.env['sale.order'].create({
+            'partner_id': self.partner_qty.id,
+            'order_line': [Command.create({'product_id': variant.id}) for variant in self.variants],
+        })
+        results.append(self._scenario(
+            'compute_price_info', len(order.order_line),
+            lambda: order.order_line.mapped('price_info'),
+        ))
+
+        for wizard_model, lines_field in PRICE_WIZARDS:
+            results.append(self._scenario(
+                f'default_get_{wizard_model}', len(self.variants),
+                lambda: [
+                    self.env[wizard_model].with_context(default_product_id=variant.id).default_get(
+                        ['product_id', lines_field])
+                    for variant in self.variants
+                ],
+            ))
+
+        report = self._report(results)
+        self.assertEqual(len(report['scenarios']), 11)
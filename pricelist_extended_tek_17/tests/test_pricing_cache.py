@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import PricingCatalogCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPricingCache(PricingCatalogCommon):
+    """Worker cache of the pricing tables of the templates."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.grid = cls.env['product.price.grid'].create({
+            'name': 'Cached Grid',
+            'family': 'regular',
+            'line_ids': [Command.create({'rule_kind': 'qty', 'min_qty': 1.0, 'max_qty': 0.0, 'margin_per': 10.0})],
+        })
+        cls.template = cls._create_template('Cached Product', price_grid_id=cls.grid.id)
+
+    def setUp(self):
+        super().setUp()
+        # the cache outlives the rolled back transactions of the other tests
+        store = self.env['pricing.cache']._get_store()
+        store.update(version=None, entries={}, warm_up=False)
+        # commit the setup, so that the transaction uses the cache
+        self._run_precommit()
+
+    def _qty_prices(self):
+        qty_table, _customer_tables = self.env['product.template']._get_pricing_tables(self.template.ids)[
+            self.template.id]
+        return [row[2] for row in qty_table]
+
+    def test_grid_deleted(self):
+        self.assertEqual(self._qty_prices(), [110.0])
+        self.assertIn(('pricing_tables', self.template.id), self.env['pricing.cache']._get_entries())
+
+        self.grid.unlink()
+        # in the transaction deleting it
+        self.assertEqual(self._qty_prices(), [])
+        # in the next transactions
+        self._run_precommit()
+        self.assertEqual(self._qty_prices(), [])
+
+    def test_grid_archived(self):
+        self.assertEqual(self._qty_prices(), [110.0])
+        self.grid.active = False
+        self._run_precommit()
+        self.assertEqual(self._qty_prices(), [])
+
+    def test_margin_flush_keeps_cache(self):
+        self._qty_prices()
+        # stored margins recomputed from a cost change do not feed the tables
+        self.template.pricing_rule_ids = [Command.create({'min_qty': 1.0, 'max_qty': 0.0, 'margin_per': 10.0})]
+        self._run_precommit()
+        self._qty_prices()
+        self.template.pricing_cost = 50.0
+        self.env.flush_all()
+        self.assertIsNotNone(self.env['pricing.cache']._get_entries())
+
+    def test_warm_up(self):
+        partner = self.env['res.partner'].create({'name': 'Warm-up Customer', 'pricing_type': 'quantity'})
+        order = self.env['sale.order'].create({
+            'partner_id': partner.id,
+            'order_line': [Command.create({'product_id': self.template.product_variant_id.id})],
+        })
+        order.action_confirm()
+        self._run_precommit()
+
+        self.env['pricing.cache']._warm_up(10)
+        entries = self.env['pricing.cache']._get_entries()
+        self.assertEqual(
+            entries[('pricing_tables', self.template.id)],
+            self.env['product.template']._build_pricing_tables(self.template.ids)[self.template.id],
+        )
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import PricingCatalogCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPricingQueryCount(PricingCatalogCommon):
+    """Pin the SQL queries of the pricing entry points.
+
+    Each entry point runs on a small and on a large input: the small run must
+    fit in the budget and the large run may not issue more queries than the
+    small one, so that an N+1 query fails here instead of in production.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.customer_types = cls._create_customer_types(5)
+        cls.partner_qty, cls.partner_fixed = cls._create_partners(cls.customer_types[0])
+        cls.products = cls._create_catalog(100, 1, 5, cls.customer_types).product_variant_ids
+
+    def _assert_query_budget(self, budget, small, large, keep=None):
+        small_queries = self._measure(small, keep=keep)['queries']
+        self.assertLessEqual(
+            small_queries, budget, "Query budget exceeded: %d > %d" % (small_queries, budget))
+        self._invalidate_all(keep)
+        with self.assertQueryCount(__system__=small_queries):
+            large()
+
+    def test_order_line_pricing(self):
+        for partner in (self.partner_qty, self.partner_fixed):
+            small_order = self._new_order(partner, self.products[:10], qty=12)
+            large_order = self._new_order(partner, self.products, qty=12)
+            orders = small_order | large_order
+            self._assert_query_budget(
+                15,
+                lambda: small_order.order_line._onchange_product_id_pricing(),
+                lambda: large_order.order_line._onchange_product_id_pricing(),
+                keep=orders | orders.order_line,
+            )
+            self._assert_lines_priced(orders.order_line)
+
+    def test_sync_pricing_to_variants(self):
+        small_template = self._create_catalog(1, 5, 5, self.customer_types, name='Small')
+        large_template = self._create_catalog(1, 20, 5, self.customer_types, name='Large')
+        self.assertEqual(len(large_template.product_variant_ids), 20)
+        self._assert_query_budget(
+            60,
+            lambda: small_template._sync_pricing_to_variants(),
+            lambda: large_template._sync_pricing_to_variants(),
+        )
+
+    def test_vendor_bill_cost_update(self):
+        # bills on the same five products: only the number of lines differs
+        products = self.products[:5]
+        small_bill = self._create_vendor_bill(list(products) * 2)
+        large_bill = self._create_vendor_bill(list(products) * 10)
+        self.assertEqual(len(large_bill.invoice_line_ids), 50)
+        self._assert_query_budget(
+            80,
+            lambda: small_bill._update_product_costs(),
+            lambda: large_bill._update_product_costs(),
+        )
+        large_bill.action_post()
+        self.assertEqual(products.product_tmpl_id.mapped('last_purchase_price'), [10.0] * 5)
+
+    def test_price_details(self):
+        small_template = self._create_catalog(1, 1, 5, self.customer_types, name='Small')
+        large_template = self._create_catalog(1, 1, 50, self.customer_types, name='Large')
+        order = self.env['sale.order'].create({
+            'partner_id': self.partner_qty.id,
+            'order_line': [
+                Command.create({'product_id': small_template.product_variant_id.id}),
+                Command.create({'product_id': large_template.product_variant_id.id}),
+            ],
+        })
+        small_line, large_line = order.order_line
+
+        def open_price_details(line):
+            action = line.action_show_price_details()
+            wizard_model = self.env[action['res_model']].with_context(**action['context'])
+            return wizard_model.default_get(list(wizard_model._fields))
+
+        self._assert_query_budget(
+            15,
+            lambda: open_price_details(small_line),
+            lambda: open_price_details(large_line),
+        )
+        self.assertEqual(len(open_price_details(large_line)['qty_price_reg_ids']), 50)
@@ -6,4 +6,5 @@ from . import price_lp_fixed_wizard
 from . import price_reg_cus_wizard
 from . import price_reg_fixed_wizard
 from . import price_lp_cus_pur_wizard
-from . import price_lp_pur_fixed_wizard
\ No newline at end of file
+from . import price_lp_pur_fixed_wizard
+from . import pricing_simulation_wizard
\ No newline at end of file
@@ -12,19 +12,21 @@ class PriceLpCusPurWizard(models.TransientModel):
 
     @api.model
     def default_get(self, fields):
-        res = super().default_get(fields)
-        product_id = self.env.context.get("default_product_id")
-        if product_id:
-            product = self.env['product.product'].browse(product_id)
-            cust_lines = []
-            for c in product.customer_lp_purchase_ids:
-                cust_lines.append((0, 0, {
-                    'customer_type_id': c.customer_type_id.id,
-                    'margin_per': c.margin_per,
-                    'amount': c.amount,
-                    'margin': c.margin,
-                }))
-            res['qty_price_ids'] = cust_lines
+        with self.env['pricing.stage.sample']._profile('price_details_wizard') as sample:
+            res = super().default_get(fields)
+            product_id = self.env.context.get("default_product_id")
+            if product_id:
+                product = self.env['product.product'].browse(product_id)
+                cust_lines = []
+                for c in product.customer_lp_purchase_ids:
+                    cust_lines.append((0, 0, {
+                        'customer_type_id': c.customer_type_id.id,
+                        'margin_per': c.margin_per,
+                        'amount': c.amount,
+                        'margin': c.margin,
+                    }))
+                res['qty_price_ids'] = cust_lines
+                sample['records'] = len(cust_lines)
         return res
 
 
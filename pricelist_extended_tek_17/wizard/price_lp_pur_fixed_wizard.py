@@ -11,19 +11,21 @@ class PricelppurfixedWizard(models.Model):
 
     @api.model
     def default_get(self, fields):
-        res = super().default_get(fields)
-        product_id = self.env.context.get("default_product_id")
-        if product_id:
-            product = self.env['product.product'].browse(product_id)
-            qty_lines = []
-            for q in product.qty_lp_purchase_ids:
-                qty_lines.append((0, 0, {
-                    'min_qty': q.min_qty,
-                    'max_qty': q.max_qty,
-                    'margin_per': q.margin_per,
-                    'amount': q.amount,
-                }))
-            res['qty_price_reg_ids'] = qty_lines
+        with self.env['pricing.stage.sample']._profile('price_details_wizard') as sample:
+            res = super().default_get(fields)
+            product_id = self.env.context.get("default_product_id")
+            if product_id:
+                product = self.env['product.product'].browse(product_id)
+                qty_lines = []
+                for q in product.qty_lp_purchase_ids:
+                    qty_lines.append((0, 0, {
+                        'min_qty': q.min_qty,
+                        'max_qty': q.max_qty,
+                        'margin_per': q.margin_per,
+                        'amount': q.amount,
+                    }))
+                res['qty_price_reg_ids'] = qty_lines
+                sample['records'] = len(qty_lines)
         return res
 
 class PriceWizardlppurFixed(models.TransientModel):
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from array import array
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+from ..lib.pricing_core import FAMILY_CODES, REGULAR, simulate
+
+_logger = logging.getLogger(__name__)
+
+
+class PricingSimulationWizard(models.TransientModel):
+    _name = 'pricing.simulation.wizard'
+    _description = 'Pricing What-If Simulation'
+
+    months = fields.Integer("Months of History", default=12, required=True)
+    product_tmpl_ids = fields.Many2many('product.template', string="Products",
+                                        help="Leave empty to simulate all products")
+    categ_ids = fields.Many2many('product.category', string="Product Categories")
+
+    operational_margin_delta = fields.Float("Operational Margin Change (%)",
+                                            help="Points added to the operational margin of the products")
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type",
+                                       help="Customer type whose margin changes, all types when empty")
+    customer_margin_delta = fields.Float("Customer Type Margin Change (%)")
+    tier_margin_delta = fields.Float("Tier Margin Change (%)")
+    tier_bound_factor = fields.Float("Tier Bounds Factor", default=1.0,
+                                     help="Factor applied to the min and max quantities of the tiers")
+
+    group_by = fields.Selection([
+        ('product', 'Product'),
+        ('category', 'Product Category'),
+        ('customer_type', 'Customer Type'),
+    ], string="Group By", default='product', required=True)
+    line_count = fields.Integer("Order Lines Simulated", readonly=True)
+    duration = fields.Float("Duration (s)", readonly=True)
+    result_ids = fields.One2many('pricing.simulation.result', 'wizard_id', string="Results", readonly=True)
+
+    def action_simulate(self):
+        self.ensure_one()
+        start = time.perf_counter()
+        lines, templates = self._load_history()
+        totals = self._simulate(lines, templates)
+        self.result_ids.unlink()
+        self.write({
+            'line_count': len(lines['qty']),
+            'duration': time.perf_counter() - start,
+            'result_ids': [(0, 0, self._prepare_result_vals(key, values)) for key, values in totals.items()],
+        })
+        _logger.info("Pricing simulation of %d order lines done in %.2fs", self.line_count, self.duration)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _load_history(self):
+        """Load the confirmed order lines of the period and the pricing data of
+        their products into compact arrays, with one query for the lines, one
+        for the rules and one for the grid rules."""
+        query = """
+            SELECT pp.product_tmpl_id, sol.product_uom_qty, sol.price_unit,
+                   so.pricing_type = 'fixed', COALESCE(so.customer_type_id, 0)
+              FROM sale_order_line sol
+              JOIN sale_order so ON so.id = sol.order_id
+              JOIN product_product pp ON pp.id = sol.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE so.state = 'sale'
+               AND sol.display_type IS NULL
+               AND so.date_order >= %(date_from)s
+        """
+        params = {'date_from': fields.Datetime.now() - relativedelta(months=self.months)}
+        if self.product_tmpl_ids:
+            query += " AND pt.id = ANY(%(template_ids)s)"
+            params['template_ids'] = self.product_tmpl_ids.ids
+        if self.categ_ids:
+            query += " AND pt.categ_id = ANY(%(categ_ids)s)"
+            params['categ_ids'] = self.env['product.category'].search([('id', 'child_of', self.categ_ids.ids)]).ids
+        self.env['sale.order.line'].flush_model()
+        self.env['sale.order'].flush_model()
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.fetchall()
+        if not rows:
+            raise UserError(_("There is no confirmed order line to simulate over the last %s months.", self.months))
+
+        template_index = {}
+        lines = {
+            'template': array('l'),
+            'qty': array('d'),
+            'price_unit': array('d'),
+            'fixed': array('b'),
+            'customer_type': array('l'),
+        }
+        for template_id, qty, price_unit, fixed, customer_type_id in rows:
+            lines['template'].append(template_index.setdefault(template_id, len(template_index)))
+            lines['qty'].append(qty)
+            lines['price_unit'].append(price_unit)
+            lines['fixed'].append(bool(fixed))
+            lines['customer_type'].append(customer_type_id)
+
+        products = self.env['product.template'].browse(list(template_index))
+        templates = {
+            'id': array('l', products.ids),
+            'categ': array('l', [p.categ_id.id for p in products]),
+            'family': array('b', [FAMILY_CODES.get(p.pricing_type, REGULAR) for p in products]),
+            'last_purchase_price': array('d', products.mapped('last_purchase_price')),
+            'operational_margin': array('d', products.mapped('operational_margin')),
+            'mrp_price': array('d', products.mapped('mrp_price')),
+            'pricing_cost': array('d', products.mapped('pricing_cost')),
+            'tiers': [[] for _i in range(len(products))],
+            'customer_margins': [{} for _i in range(len(products))],
+        }
+
+        self.env['product.pricing.rule'].flush_model()
+        self.env.cr.execute("""
+            SELECT r.product_tmpl_id, r.rule_kind, r.min_qty, r.max_qty, r.customer_type_id, r.margin_per
+              FROM product_pricing_rule r
+              JOIN product_template pt ON pt.id = r.product_tmpl_id AND pt.pricing_type = r.family
+             WHERE r.product_tmpl_id = ANY(%s)
+          ORDER BY r.min_qty, r.id
+        """, [list(template_index)])
+        own_rules = self.env.cr.fetchall()
+
+        # shared grid rules, for the rule kinds a product has no own rules for
+        self.env['product.price.grid'].flush_model(['family', 'active'])
+        self.env['product.price.grid.line'].flush_model()
+        self.env.cr.execute("""
+            SELECT pt.id, l.rule_kind, l.min_qty, l.max_qty, l.customer_type_id, l.margin_per
+              FROM product_template pt
+              JOIN product_price_grid g ON g.id = pt.price_grid_id AND g.family = pt.pricing_type AND g.active
+              JOIN product_price_grid_line l ON l.grid_id = g.id
+             WHERE pt.id = ANY(%s)
+          ORDER BY l.min_qty, l.id
+        """, [list(template_index)])
+        own_rule_kinds = {(template_id, rule_kind) for template_id, rule_kind, *_values in own_rules}
+        grid_rules = [rule for rule in self.env.cr.fetchall() if (rule[0], rule[1]) not in own_rule_kinds]
+
+        for template_id, rule_kind, min_qty, max_qty, customer_type_id, margin_per in own_rules + grid_rules:
+            index = template_index[template_id]
+            if rule_kind == 'qty':
+                templates['tiers'][index].append((min_qty, max_qty, margin_per))
+            else:
+                templates['customer_margins'][index].setdefault(customer_type_id, margin_per)
+        return lines, templates
+
+    def _simulate(self, lines, templates):
+        """Return the [qty, revenue, new revenue, margin, new margin] totals
+        of each group, see ``pricing_core.simulate``"""
+        CustomerType = self.env['res.partner.customer.type']
+        ancestors = {type_id: CustomerType._get_ancestor_ids(type_id) for type_id in set(lines['customer_type'])}
+        scenario = {
+            'operational_delta': self.operational_margin_delta,
+            'customer_delta': self.customer_margin_delta,
+            'customer_type_id': self.customer_type_id.id,
+            'tier_delta': self.tier_margin_delta,
+            'bound_factor': self.tier_bound_factor,
+        }
+        return simulate(lines, templates, ancestors, scenario, self.group_by)
+
+    def _prepare_result_vals(self, key, values):
+        qty, revenue, new_revenue, margin, new_margin = values
+        vals = {
+            'qty': qty,
+            'revenue': revenue,
+            'new_revenue': new_revenue,
+            'revenue_delta': new_revenue - revenue,
+            'margin': margin,
+            'new_margin': new_margin,
+            'margin_delta': new_margin - margin,
+        }
+        if self.group_by == 'product':
+            vals['product_tmpl_id'] = key
+        elif self.group_by == 'category':
+            vals['categ_id'] = key
+        else:
+            vals['customer_type_id'] = key or False
+        return vals
+
+
+class PricingSimulationResult(models.TransientModel):
+    _name = 'pricing.simulation.result'
+    _description = 'Pricing What-If Simulation Result'
+    _order = 'margin_delta'
+
+    wizard_id = fields.Many2one('pricing.simulation.wizard', ondelete="cascade")
+    product_tmpl_id = fields.Many2one('product.template', string="Product")
+    categ_id = fields.Many2one('product.category', string="Product Category")
+    customer_type_id = fields.Many2one('res.partner.customer.type', string="Customer Type")
+    qty = fields.Float("Quantity")
+    revenue = fields.Float("Revenue")
+    new_revenue = fields.Float("Simulated Revenue")
+    revenue_delta = fields.Float("Revenue Change")
+    margin = fields.Float("Margin")
+    new_margin = fields.Float("Simulated Margin")
+    margin_delta = fields.Float("Margin Change")